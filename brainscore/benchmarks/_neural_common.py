@@ -2,13 +2,19 @@ import numpy as np
 
 from brainio_base.assemblies import array_is_element, walk_coords
 from brainscore.benchmarks import BenchmarkBase, ceil_score
+from brainscore.metrics.utils import group_mean
 
 
 class NeuralBenchmark(BenchmarkBase):
-    def __init__(self, identifier, assembly, similarity_metric, **kwargs):
+    def __init__(self, identifier, assembly, similarity_metric, source_reduction=None, **kwargs):
+        """
+        :param source_reduction: optional function applied to the candidate's activations before the metric,
+            e.g. a :class:`~brainscore.metrics.dimensionality_reduction.SourceProjection`
+        """
         super(NeuralBenchmark, self).__init__(identifier=identifier, **kwargs)
         self._assembly = assembly
         self._similarity_metric = similarity_metric
+        self._source_reduction = source_reduction
         region = np.unique(self._assembly['region'])
         assert len(region) == 1
         self.region = region[0]
@@ -20,6 +26,8 @@ class NeuralBenchmark(BenchmarkBase):
         source_assembly = candidate.look_at(self._assembly.stimulus_set)
         if 'time_bin' in source_assembly.dims:
             source_assembly = source_assembly.squeeze('time_bin')  # static case for these benchmarks
+        if self._source_reduction is not None:
+            source_assembly = self._source_reduction(source_assembly)
         raw_score = self._similarity_metric(source_assembly, self._assembly)
         return explained_variance(raw_score, self.ceiling)
 
@@ -48,7 +56,7 @@ def average_repetition(assembly):
     def avg_repr(assembly):
         presentation_coords = [coord for coord, dims, values in walk_coords(assembly)
                                if array_is_element(dims, 'presentation') and coord != 'repetition']
-        assembly = assembly.multi_groupby(presentation_coords).mean(dim='presentation', skipna=True)
+        assembly = group_mean(assembly, dim='presentation', group_coords=presentation_coords, skipna=True)
         return assembly
 
     return apply_keep_attrs(assembly, avg_repr)
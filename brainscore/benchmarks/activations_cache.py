@@ -0,0 +1,70 @@
+import logging
+import os
+
+from brainscore.model_interface import BrainModel
+from brainscore.utils import fullname
+
+
+class ActivationsCache(BrainModel):
+    """
+    Wraps a candidate model and keeps the assemblies it returns when recording
+    so that benchmarks showing the same stimulus set to the same recording target (e.g. all Majaj2015 IT variants)
+    only extract features once.
+    Activations are keyed by (model identifier, recording target, time bins, stimulus set name);
+    stimulus sets without a name and task outputs are never cached.
+    Pass an :class:`~brainscore.utils.assembly_store.AssemblyStore` as `store` to also keep activations on disk.
+    """
+
+    def __init__(self, candidate, identifier=None, store=None):
+        self._candidate = candidate
+        self.identifier = identifier or getattr(candidate, 'identifier', None)
+        assert self.identifier is not None, "need a model identifier to cache activations"
+        self._store = store
+        self._activations = {}
+        self._recording = None
+        self._logger = logging.getLogger(fullname(self))
+
+    def start_recording(self, recording_target, time_bins=None):
+        self._recording = (_target_key(recording_target), _time_bins_key(time_bins))
+        return self._candidate.start_recording(recording_target, time_bins=time_bins)
+
+    def start_task(self, task, fitting_stimuli):
+        self._recording = None
+        return self._candidate.start_task(task, fitting_stimuli)
+
+    def look_at(self, stimuli):
+        stimulus_set_name = getattr(stimuli, 'name', None)
+        if self._recording is None or stimulus_set_name is None:
+            return self._candidate.look_at(stimuli)
+        key = (self.identifier,) + self._recording + (stimulus_set_name,)
+        if key in self._activations:
+            self._logger.debug(f"Re-using activations for {key}")
+            return self._copy(self._activations[key])
+        store_identifier = os.path.join('activations', *key)
+        if self._store is not None and self._store.exists(store_identifier):
+            activations = self._store.load(store_identifier)
+        else:
+            activations = self._candidate.look_at(stimuli)
+            if self._store is not None:
+                self._store.save(activations, store_identifier)
+        self._activations[key] = activations
+        return self._copy(activations)
+
+    def _copy(self, activations):
+        # shallow copy to keep benchmarks from altering each other's coords and attrs
+        return activations.copy(deep=False)
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name == '_candidate':
+            raise AttributeError(name)
+        return getattr(self._candidate, name)
+
+
+def _target_key(recording_target):
+    return getattr(recording_target, 'name', str(recording_target))
+
+
+def _time_bins_key(time_bins):
+    if time_bins is None:
+        return ''
+    return ",".join(f"{int(start)}-{int(end)}" for start, end in time_bins)
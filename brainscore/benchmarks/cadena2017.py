@@ -4,6 +4,8 @@ from brainscore.benchmarks._neural_common import NeuralBenchmark
 from brainscore.metrics.ceiling import InternalConsistency
 from brainscore.metrics.regression import CrossRegressedCorrelation, mask_regression, pls_regression, \
     pearsonr_correlation
+from brainscore.metrics.utils import group_mean
+from brainscore.utils.assembly_store import store_assembly
 
 
 def ToliasCadena2017PLS():
@@ -54,6 +56,7 @@ def ToliasCadena2017Mask():
 class AssemblyLoader:
     name = 'tolias.Cadena2017'
 
+    @store_assembly()
     def __call__(self, average_repetition=True):
         assembly = brainscore.get_assembly(name='tolias.Cadena2017')
         assembly = assembly.rename({'neuroid': 'neuroid_id'}).stack(neuroid=['neuroid_id'])
@@ -72,9 +75,8 @@ class AssemblyLoader:
     def average_repetition(self, assembly):
         attrs = assembly.attrs  # workaround to keeping attrs
         presentation_coords = [coord for coord, dims, values in walk_coords(assembly)
-                               if array_is_element(dims, 'presentation')]
-        presentation_coords = set(presentation_coords) - {'repetition_id', 'id'}
-        assembly = assembly.multi_groupby(presentation_coords).mean(dim='presentation', skipna=True)
+                               if array_is_element(dims, 'presentation') and coord not in ['repetition_id', 'id']]
+        assembly = group_mean(assembly, dim='presentation', group_coords=presentation_coords, skipna=True)
         assembly, stimulus_set = self.dropna(assembly, stimulus_set=attrs['stimulus_set'])
         attrs['stimulus_set'] = stimulus_set
         assembly.attrs = attrs
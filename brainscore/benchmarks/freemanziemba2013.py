@@ -4,7 +4,7 @@ from brainscore.metrics.ceiling import InternalConsistency, RDMConsistency
 from brainscore.metrics.rdm import RDMCrossValidated
 from brainscore.metrics.regression import CrossRegressedCorrelation, pls_regression, pearsonr_correlation
 from brainscore.utils import LazyLoad
-from result_caching import store
+from brainscore.utils.assembly_store import store_assembly
 
 
 def _MovshonFreemanZiemba2013Region(region, identifier_metric_suffix, similarity_metric, ceiler):
@@ -47,7 +47,7 @@ def MovshonFreemanZiemba2013V2RDM():
                                            ceiler=RDMConsistency())
 
 
-@store()
+@store_assembly()
 def load_assembly(average_repetitions, region, access='private'):
     assembly = brainscore.get_assembly(f'movshon.FreemanZiemba2013.{access}')
     assembly = assembly.sel(region=region)
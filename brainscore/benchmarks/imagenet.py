@@ -1,3 +1,4 @@
+import logging
 import os
 
 import numpy as np
@@ -6,17 +7,28 @@ import pandas as pd
 from brainio_base.stimuli import StimulusSet
 from brainscore.benchmarks import BenchmarkBase
 from brainscore.metrics import Score
-from brainscore.metrics.accuracy import Accuracy
+from brainscore.metrics.accuracy import Accuracy, IncrementalAccuracy
 from brainscore.model_interface import BrainModel
+from brainscore.utils import atomic_write, default_cache_directory
+
+_logger = logging.getLogger(__name__)
 
 
 class Imagenet2012(BenchmarkBase):
-    def __init__(self):
-        stimulus_set = pd.read_csv(os.path.join(os.path.dirname(__file__), 'imagenet2012.csv'))
+    def __init__(self, per_synset=False):
+        """
+        :param per_synset: also report the accuracy of every synset in the score's `per_label` attribute
+        """
+        stimulus_set = load_stimulus_set(os.path.join(os.path.dirname(__file__), 'imagenet2012.csv'),
+                                         categorical_columns=['synset'])
         stimulus_set = StimulusSet(stimulus_set)
-        stimulus_set.image_paths = {row.image_id: row.filepath for row in stimulus_set.itertuples()}
+        stimulus_set.image_paths = dict(zip(stimulus_set['image_id'].values, stimulus_set['filepath'].values))
         self._stimulus_set = stimulus_set
+        self._synsets = stimulus_set['synset'].values  # categorical: predictions are compared on integer codes
+        self._candidate_stimulus_set = stimulus_set[[column for column in stimulus_set.columns if column != 'synset']]
         self._similarity_metric = Accuracy()
+        self._per_synset = per_synset
+        self._batch_size = 256
         ceiling = Score([1, np.nan], coords={'aggregation': ['center', 'error']}, dims=['aggregation'])
         super(Imagenet2012, self).__init__(identifier='fei-fei.Deng2009-top1', version=1,
                                            ceiling_func=lambda: ceiling,
@@ -28,6 +40,93 @@ class Imagenet2012(BenchmarkBase):
         # for now, since all models in our hands were trained with imagenet, we'll just short-cut this
         # by telling the candidate to use its pre-trained imagenet weights.
         candidate.start_task(BrainModel.Task.label, 'imagenet')
-        predictions = candidate.look_at(self._stimulus_set[list(set(self._stimulus_set.columns) - {'synset'})])
-        score = self._similarity_metric(predictions, self._stimulus_set['synset'].values)
+        stimulus_set = self._candidate_stimulus_set
+        if streams_outputs(candidate):
+            return self._score_batches(candidate, stimulus_set)
+        predictions = candidate.look_at(stimulus_set)
+        prediction_codes = self._synset_codes(predictions)
+        score = self._similarity_metric(prediction_codes, self._synsets.codes)
+        if self._per_synset:
+            accuracy = IncrementalAccuracy(per_label=True)
+            accuracy.update(prediction_codes, self._synsets.codes)
+            score.attrs['per_label'] = self._label_synsets(accuracy.result().attrs['per_label'])
+        return score
+
+    def _score_batches(self, candidate, stimulus_set):
+        # score batch by batch in constant memory, without keeping all predictions
+        synset_codes = self._synsets.codes
+        accuracy = IncrementalAccuracy(per_label=self._per_synset)
+        batch_start = 0
+        for predictions in candidate.look_at_batches(stimulus_set, batch_size=self._batch_size):
+            accuracy.update(self._synset_codes(predictions),
+                            synset_codes[batch_start:batch_start + len(predictions)])
+            batch_start += len(predictions)
+        assert batch_start == len(synset_codes)
+        score = accuracy.result()
+        if self._per_synset:
+            score.attrs['per_label'] = self._label_synsets(score.attrs['per_label'])
         return score
+
+    def _label_synsets(self, per_label):
+        # accuracies are accumulated per synset code, report them per synset
+        per_label['label'] = np.asarray(self._synsets.categories)[per_label['label'].values]
+        return per_label
+
+    def _synset_codes(self, predictions):
+        # unknown synsets get code -1 and thus never match
+        predictions = np.asarray(predictions).reshape(-1)
+        return pd.Categorical(predictions, categories=self._synsets.categories).codes
+
+
+def streams_outputs(candidate):
+    """
+    :return: whether the candidate implements its own `look_at_batches`
+        rather than the default that only splits the stimuli for `look_at`
+    """
+    look_at_batches = getattr(type(candidate), 'look_at_batches', None)
+    return look_at_batches is not None and look_at_batches is not BrainModel.look_at_batches
+
+
+def load_stimulus_set(csv_path, categorical_columns=(), cache_directory=None):
+    """
+    Reads a stimulus table from a csv file, caching its columns as typed `.npy` arrays
+    so that subsequent loads (e.g. in every fresh process) skip parsing the csv.
+    The cache is keyed by the csv's name, size and modification time, so edits to the csv invalidate it.
+    :param categorical_columns: columns to hold as `pd.Categorical`, cached as integer codes and categories
+    :param cache_directory: defaults to `$RESULTCACHING_HOME/stimulus_tables`
+    """
+    if cache_directory is None:
+        cache_directory = default_cache_directory('stimulus_tables')
+    stat = os.stat(csv_path)
+    cache_path = os.path.join(os.path.expanduser(cache_directory),
+                              f"{os.path.basename(csv_path)}-{stat.st_size}-{stat.st_mtime_ns}")
+    columns_path = os.path.join(cache_path, 'columns.npy')
+    if os.path.isfile(columns_path):
+        columns = np.load(columns_path)
+        table = {}
+        for i, column in enumerate(columns):
+            values = np.load(os.path.join(cache_path, f"{i}.npy"), allow_pickle=True)
+            if column in categorical_columns:
+                values = pd.Categorical.from_codes(np.load(os.path.join(cache_path, f"{i}.codes.npy")),
+                                                   categories=values)
+            table[column] = values
+        return pd.DataFrame(table, columns=columns)
+
+    table = pd.read_csv(csv_path)
+    for column in categorical_columns:
+        table[column] = table[column].astype('category')
+    _logger.debug(f"Caching stimulus table columns in {cache_path}")
+    # keep the cache if another process wrote it in the meantime
+    with atomic_write(cache_path, directory=True, overwrite=False) as tmp_path:
+        np.save(os.path.join(tmp_path, 'columns.npy'), np.array(table.columns, dtype=str))
+        for i, column in enumerate(table.columns):
+            values = table[column]
+            if column in categorical_columns:
+                np.save(os.path.join(tmp_path, f"{i}.codes.npy"), values.cat.codes.values)
+                values = values.cat.categories
+            values = np.asarray(values)
+            if values.dtype == object and not pd.isnull(values).any():
+                values = values.astype(str)  # fixed-width strings load without unpickling
+            np.save(os.path.join(tmp_path, f"{i}.npy"), values, allow_pickle=True)
+    return table
+
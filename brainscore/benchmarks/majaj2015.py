@@ -5,6 +5,7 @@ from brainscore.metrics.rdm import RDMCrossValidated
 from brainscore.metrics.regression import CrossRegressedCorrelation, mask_regression, ScaledCrossRegressedCorrelation, \
     pls_regression, pearsonr_correlation
 from brainscore.utils import LazyLoad
+from brainscore.utils.assembly_store import store_assembly
 
 
 def _DicarloMajaj2015Region(region, identifier_metric_suffix, similarity_metric, ceiler):
@@ -62,6 +63,7 @@ def DicarloMajaj2015ITRDM():
                                    ceiler=RDMConsistency())
 
 
+@store_assembly()
 def load_assembly(average_repetitions, region, access='private'):
     assembly = brainscore.get_assembly(name=f'dicarlo.Majaj2015.{access}')
     assembly = assembly.sel(region=region)
@@ -0,0 +1,230 @@
+"""
+Scores a candidate on multiple benchmarks, computing the metrics in parallel.
+
+Every benchmark is built and run in a worker process, on a proxy model that requests the candidate's outputs
+from the main process. The candidate only ever runs in the main process:
+pending requests are grouped by what they ask the candidate to do (task or recording target, and stimulus set),
+so that the candidate computes the outputs of a group once, and activations are further shared across groups that
+show the same stimulus set to the same recording target
+(see :class:`~brainscore.benchmarks.activations_cache.ActivationsCache`).
+Scores are yielded as soon as their benchmark completes, while the candidate keeps serving the others.
+
+Usage: `python -m brainscore.benchmarks.runner --candidate my_module:my_model dicarlo.Majaj2015.IT-pls ...`
+"""
+
+import argparse
+import functools
+import importlib
+import logging
+import multiprocessing
+import queue
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from brainio_base.stimuli import StimulusSet
+from brainscore.benchmarks import benchmark_pool, load
+from brainscore.benchmarks.activations_cache import ActivationsCache
+from brainscore.model_interface import BrainModel
+from brainscore.utils import fullname, LazyLoad
+
+_logger = logging.getLogger(__name__)
+
+
+def _pack_stimuli(stimuli):
+    # attributes of a StimulusSet such as its `image_paths` and `name` are lost when pickling the DataFrame
+    if not isinstance(stimuli, StimulusSet):
+        return stimuli, None
+    return pd.DataFrame(stimuli), dict(image_paths=getattr(stimuli, 'image_paths', None),
+                                       name=getattr(stimuli, 'name', None))
+
+
+def _unpack_stimuli(stimuli, attributes):
+    if attributes is None:
+        return stimuli
+    stimuli = StimulusSet(stimuli)
+    for attribute, value in attributes.items():
+        if value is not None:
+            setattr(stimuli, attribute, value)
+    return stimuli
+
+
+class RemoteModel(BrainModel):
+    """
+    Stands in for the candidate in a worker process by requesting the candidate's outputs from the main process.
+    The task or recording set-up is sent along with every `look_at`,
+    so that the requests of concurrently running benchmarks cannot interfere with each other's set-up.
+    """
+
+    def __init__(self, benchmark_identifier, requests, responses):
+        self._benchmark_identifier = benchmark_identifier
+        self._requests = requests
+        self._responses = responses
+        self._setup = None
+
+    # the functionally created enums of `BrainModel` cannot be pickled and are therefore sent by name
+    def start_recording(self, recording_target, time_bins=None):
+        if isinstance(recording_target, BrainModel.RecordingTarget):
+            recording_target = 'RecordingTarget', recording_target.name
+        self._setup = 'start_recording', (recording_target, time_bins)
+
+    def start_task(self, task, fitting_stimuli):
+        self._setup = 'start_task', (task.name, _pack_stimuli(fitting_stimuli))
+
+    def look_at(self, stimuli):
+        self._requests.put((self._benchmark_identifier, self._setup, _pack_stimuli(stimuli)))
+        error, outputs = self._responses.get()
+        if error is not None:
+            raise RuntimeError(f"candidate failed on the stimuli of {self._benchmark_identifier}") from error
+        return outputs
+
+
+def _loaded(benchmark):
+    return benchmark
+
+
+def _benchmark_loader(benchmark_identifier):
+    """
+    :return: a picklable function building the benchmark in a worker without relying on the main process'
+        `benchmark_pool` (workers started with `spawn`, the default on macOS and Windows, import a fresh pool
+        that lacks benchmarks registered at runtime): the constructor of lazily loaded benchmarks,
+        which are thus only ever built in the worker, or a function returning an already built benchmark
+    """
+    benchmark = load(benchmark_identifier)
+    if isinstance(benchmark, LazyLoad):
+        return benchmark.load_fnc
+    return functools.partial(_loaded, benchmark)
+
+
+def _score(benchmark_identifier, benchmark_loader, requests, responses):
+    benchmark = benchmark_loader()
+    return benchmark(RemoteModel(benchmark_identifier, requests, responses))
+
+
+def _group_requests(requests):
+    """
+    :param requests: `(benchmark_identifier, setup, packed_stimuli)` tuples
+    :return: a mapping from the set-up and stimulus set of the requests to the benchmarks requesting them.
+        Stimuli without a name are never grouped.
+    """
+    groups = OrderedDict()
+    for benchmark_identifier, setup, (stimuli, attributes) in requests:
+        name = attributes['name'] if attributes is not None else None
+        setup_key = _setup_key(setup)
+        key = (setup_key, name) if name is not None and setup_key is not None else (benchmark_identifier,)
+        if key not in groups:
+            groups[key] = setup, _unpack_stimuli(stimuli, attributes), []
+        groups[key][2].append(benchmark_identifier)
+    return groups
+
+
+def _setup_key(setup):
+    """
+    :return: a hashable identifier of the set-up, or None if it cannot be identified (and is thus not grouped)
+    """
+    if setup is None:
+        return 'none',
+    method, args = setup
+    if method == 'start_recording':
+        recording_target, time_bins = args
+        return method, recording_target, None if time_bins is None else tuple(map(tuple, time_bins))
+    task, (fitting_stimuli, attributes) = args
+    fitting_name = attributes['name'] if attributes is not None else fitting_stimuli
+    if not isinstance(fitting_name, str):
+        return None
+    return method, task, fitting_name
+
+
+def _serve(candidate, setup, stimuli):
+    if setup is not None:
+        method, args = setup
+        if method == 'start_task':
+            task, fitting_stimuli = args
+            candidate.start_task(BrainModel.Task[task], _unpack_stimuli(*fitting_stimuli))
+        else:
+            recording_target, time_bins = args
+            if isinstance(recording_target, tuple):
+                recording_target = BrainModel.RecordingTarget[recording_target[1]]
+            candidate.start_recording(recording_target, time_bins=time_bins)
+    return candidate.look_at(stimuli)
+
+
+def run(benchmark_identifiers, candidate, max_workers=None, mp_context=None, poll_interval=.1):
+    """
+    Scores the candidate on all benchmarks.
+    Benchmarks run in worker processes while the candidate serves their requests for outputs in the main process,
+    grouped by set-up and stimulus set (see the module documentation).
+    :param benchmark_identifiers: identifiers of benchmarks in the `benchmark_pool`
+    :param max_workers: number of worker processes running benchmarks, defaults to the number of processors
+    :param mp_context: the multiprocessing context to start workers with, the platform's default if not given
+    :param poll_interval: seconds to wait for new requests before checking for completed benchmarks
+    :return: a generator of `(benchmark_identifier, score)` tuples, in the order in which scores complete
+    """
+    unknown = [identifier for identifier in benchmark_identifiers if identifier not in benchmark_pool]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {unknown} - must choose from {list(benchmark_pool.keys())}")
+    if not isinstance(candidate, ActivationsCache):
+        candidate = ActivationsCache(candidate, identifier=getattr(candidate, 'identifier', None) or fullname(candidate))
+    manager = (mp_context or multiprocessing).Manager()
+    with manager, ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as pool:
+        requests = manager.Queue()
+        responses = {identifier: manager.Queue() for identifier in benchmark_identifiers}
+        futures = {pool.submit(_score, identifier, _benchmark_loader(identifier), requests, responses[identifier]):
+                       identifier for identifier in benchmark_identifiers}
+        try:
+            while futures:
+                for future in [future for future in futures if future.done()]:
+                    yield futures.pop(future), future.result()
+                pending = _drain(requests, timeout=poll_interval)
+                for setup, stimuli, requesting_identifiers in _group_requests(pending).values():
+                    _logger.debug(f"Computing outputs for {requesting_identifiers}")
+                    try:
+                        outputs, error = _serve(candidate, setup, stimuli), None
+                    except Exception as e:
+                        outputs, error = None, e
+                    for identifier in requesting_identifiers:
+                        responses[identifier].put((error, outputs))
+        finally:  # release workers that still wait for outputs so that the pool can shut down
+            for future in futures:
+                future.cancel()
+            while not all(future.done() for future in futures):
+                for identifier, _, _ in _drain(requests, timeout=poll_interval):
+                    responses[identifier].put((RuntimeError("runner stopped"), None))
+
+
+def _drain(requests, timeout):
+    try:
+        pending = [requests.get(timeout=timeout)]
+    except queue.Empty:
+        return []
+    while True:
+        try:
+            pending.append(requests.get_nowait())
+        except queue.Empty:
+            return pending
+
+
+def _load_candidate(reference):
+    module_name, attribute = reference.split(':')
+    candidate = getattr(importlib.import_module(module_name), attribute)
+    if not hasattr(candidate, 'look_at'):  # factory
+        candidate = candidate()
+    return candidate
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Score a candidate on benchmarks in parallel")
+    parser.add_argument('--candidate', required=True,
+                        help="the candidate as `module:attribute`, either a BrainModel or a function returning one")
+    parser.add_argument('--max_workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('benchmarks', nargs='*', default=list(benchmark_pool.keys()),
+                        help="benchmark identifiers, all benchmarks by default")
+    args = parser.parse_args(args)
+    candidate = _load_candidate(args.candidate)
+    for benchmark_identifier, score in run(args.benchmarks, candidate, max_workers=args.max_workers):
+        print(f"{benchmark_identifier}: {score.sel(aggregation='center').values}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
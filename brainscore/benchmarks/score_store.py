@@ -0,0 +1,170 @@
+import logging
+import os
+import pickle
+import sqlite3
+
+from brainscore.utils import fullname, atomic_write, default_cache_directory
+
+
+class DirectoryBackend:
+    """
+    Keeps one pickle file per (benchmark, model, layer commitment) in a directory tree
+    `<directory>/<benchmark>/<model>/<layer commitment>.pkl`.
+    """
+
+    def __init__(self, directory):
+        self._directory = os.path.expanduser(directory)
+
+    def _path(self, benchmark_identifier, model_identifier, layer_commitment):
+        return os.path.join(self._directory, benchmark_identifier, model_identifier, f"{layer_commitment}.pkl")
+
+    def get(self, benchmark_identifier, model_identifier, layer_commitment):
+        path = self._path(benchmark_identifier, model_identifier, layer_commitment)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+        return entry['version'], entry['score']
+
+    def put(self, benchmark_identifier, model_identifier, layer_commitment, version, score):
+        path = self._path(benchmark_identifier, model_identifier, layer_commitment)
+        with atomic_write(path) as tmp_path, open(tmp_path, 'wb') as f:
+            pickle.dump({'version': version, 'score': score}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def invalidate(self, benchmark_identifier, keep_version=None):
+        directory = os.path.join(self._directory, benchmark_identifier)
+        removed = 0
+        if not os.path.isdir(directory):
+            return removed
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if not filename.endswith('.pkl'):
+                    continue
+                path = os.path.join(root, filename)
+                if keep_version is not None:
+                    with open(path, 'rb') as f:
+                        if pickle.load(f)['version'] == keep_version:
+                            continue
+                os.remove(path)
+                removed += 1
+        return removed
+
+
+class SqliteBackend:
+    """
+    Keeps all scores in a single sqlite database file, one row per (benchmark, model, layer commitment).
+    """
+
+    def __init__(self, path):
+        self._path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS scores ("
+                               "benchmark TEXT NOT NULL, model TEXT NOT NULL, layer_commitment TEXT NOT NULL, "
+                               "version TEXT NOT NULL, score BLOB NOT NULL, "
+                               "PRIMARY KEY (benchmark, model, layer_commitment))")
+
+    def _connect(self):
+        return sqlite3.connect(self._path, timeout=60)
+
+    def get(self, benchmark_identifier, model_identifier, layer_commitment):
+        with self._connect() as connection:
+            row = connection.execute("SELECT version, score FROM scores "
+                                     "WHERE benchmark = ? AND model = ? AND layer_commitment = ?",
+                                     (benchmark_identifier, model_identifier, layer_commitment)).fetchone()
+        if row is None:
+            return None
+        version, score = row
+        return pickle.loads(version), pickle.loads(score)
+
+    def put(self, benchmark_identifier, model_identifier, layer_commitment, version, score):
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                               (benchmark_identifier, model_identifier, layer_commitment,
+                                pickle.dumps(version), pickle.dumps(score, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def invalidate(self, benchmark_identifier, keep_version=None):
+        with self._connect() as connection:
+            if keep_version is None:
+                cursor = connection.execute("DELETE FROM scores WHERE benchmark = ?", (benchmark_identifier,))
+            else:
+                cursor = connection.execute("DELETE FROM scores WHERE benchmark = ? AND version != ?",
+                                            (benchmark_identifier, pickle.dumps(keep_version)))
+            return cursor.rowcount
+
+
+class ScoreStore:
+    """
+    Stores benchmark scores keyed by (benchmark identifier, benchmark version, model identifier, layer commitment).
+    A stored score is only returned if it was computed with the benchmark's current version,
+    i.e. bumping a benchmark's version invalidates all its scores.
+    """
+
+    def __init__(self, backend=None):
+        if backend is None:
+            backend = DirectoryBackend(default_cache_directory('scores'))
+        self._backend = backend
+        self._logger = logging.getLogger(fullname(self))
+
+    def load(self, benchmark, model_identifier, layer_commitment=None):
+        entry = self._backend.get(benchmark.identifier, model_identifier, _layer_commitment_key(layer_commitment))
+        if entry is None:
+            return None
+        version, score = entry
+        if version != benchmark.version:
+            self._logger.debug(f"Ignoring stored score of {model_identifier} on {benchmark.identifier} "
+                               f"for outdated version {version} (current: {benchmark.version})")
+            return None
+        return score
+
+    def save(self, score, benchmark, model_identifier, layer_commitment=None):
+        self._backend.put(benchmark.identifier, model_identifier, _layer_commitment_key(layer_commitment),
+                          benchmark.version, score)
+
+    def invalidate(self, benchmark, keep_current=True):
+        """
+        Removes stored scores of the benchmark.
+        :param keep_current: only remove scores of versions other than the benchmark's current version
+        :return: the number of removed scores
+        """
+        return self._backend.invalidate(benchmark.identifier, keep_version=benchmark.version if keep_current else None)
+
+
+def _layer_commitment_key(layer_commitment):
+    if layer_commitment is None:
+        return ''
+    if isinstance(layer_commitment, dict):
+        return ",".join(f"{key}={value}" for key, value in sorted(layer_commitment.items()))
+    return str(layer_commitment)
+
+
+class StoredBenchmark:
+    """
+    Wraps a benchmark such that scores are looked up in a :class:`ScoreStore` before scoring the candidate
+    and saved to it afterwards.
+    The model identifier is either passed explicitly or taken from `candidate.identifier`;
+    candidates without an identifier are scored without the store.
+    """
+
+    def __init__(self, benchmark, store=None):
+        self._benchmark = benchmark
+        self._store = store or ScoreStore()
+        self._logger = logging.getLogger(fullname(self))
+
+    def __call__(self, candidate, model_identifier=None, layer_commitment=None):
+        model_identifier = model_identifier or getattr(candidate, 'identifier', None)
+        if model_identifier is None:
+            self._logger.warning(f"No model identifier for {candidate} - not using stored scores")
+            return self._benchmark(candidate)
+        score = self._store.load(self._benchmark, model_identifier, layer_commitment=layer_commitment)
+        if score is not None:
+            self._logger.debug(f"Using stored score of {model_identifier} on {self._benchmark.identifier}")
+            return score
+        score = self._benchmark(candidate)
+        self._store.save(score, self._benchmark, model_identifier, layer_commitment=layer_commitment)
+        return score
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name == '_benchmark':
+            raise AttributeError(name)
+        return getattr(self._benchmark, name)
@@ -1,5 +1,6 @@
 import numpy as np
 
+from brainio_base.assemblies import DataAssembly
 from brainscore.metrics import Score
 
 
@@ -12,3 +13,42 @@ class Accuracy:
         score = Score([center, error], coords={'aggregation': ['center', 'error']}, dims=('aggregation',))
         score.attrs[Score.RAW_VALUES_KEY] = values
         return score
+
+
+class IncrementalAccuracy:
+    """
+    Accuracy over batches of predictions, keeping only running counts and sums of squares
+    instead of the per-sample correctness (which is therefore not stored in the score's raw values).
+    With `per_label`, the score's `per_label` attribute holds the accuracy of each target label.
+    """
+
+    def __init__(self, per_label=False):
+        self._per_label = per_label
+        self._count, self._sum, self._sum_squares = 0, 0., 0.
+        self._label_counts, self._label_sums = {}, {}
+
+    def update(self, source, target):
+        target = np.asarray(target)
+        values = np.asarray(source) == target
+        self._count += len(values)
+        self._sum += values.sum()
+        self._sum_squares += (values.astype(float) ** 2).sum()
+        if self._per_label:
+            labels, label_indices = np.unique(target, return_inverse=True)
+            counts = np.bincount(label_indices, minlength=len(labels))
+            sums = np.bincount(label_indices, weights=values, minlength=len(labels))
+            for label, count, label_sum in zip(labels, counts, sums):
+                self._label_counts[label] = self._label_counts.get(label, 0) + count
+                self._label_sums[label] = self._label_sums.get(label, 0) + label_sum
+
+    def result(self):
+        center = self._sum / self._count
+        error = np.sqrt(max(self._sum_squares / self._count - center ** 2, 0))  # same as `np.std` over all values
+
+        score = Score([center, error], coords={'aggregation': ['center', 'error']}, dims=('aggregation',))
+        if self._per_label:
+            labels = sorted(self._label_counts)
+            score.attrs['per_label'] = DataAssembly(
+                [self._label_sums[label] / self._label_counts[label] for label in labels],
+                coords={'label': labels}, dims=['label'])
+        return score
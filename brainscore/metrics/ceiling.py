@@ -1,11 +1,13 @@
+import numpy as np
 import scipy.stats
 import xarray as xr
 from tqdm import tqdm
 
-from brainio_base.assemblies import walk_coords
+from brainio_base.assemblies import walk_coords, array_is_element
 from brainscore.metrics import Score
 from brainscore.metrics.rdm import RDMMetric
-from brainscore.metrics.transformations import CrossValidationSingle
+from brainscore.metrics.transformations import CrossValidationSingle, Split, apply_aggregate
+from brainscore.metrics.utils import factorize
 from brainscore.metrics.xarray_utils import Defaults as XarrayDefaults
 from brainscore.metrics.xarray_utils import XarrayCorrelation
 
@@ -62,16 +64,129 @@ class _SplitHalvesConsistency(Ceiling):
             return average
 
 
+class _VectorizedSplitHalvesConsistency(Ceiling):
+    """
+    Computes the same Spearman-Brown corrected split-half consistency per neuroid as
+    :class:`_SplitHalvesConsistency` with a :class:`SplitHalfConsistency`,
+    but for all splits and neuroids at once:
+    the repetitions are integer-coded once, the per-stimulus sums of every repetition are computed in one pass,
+    and the half means of all splits are combined from those sums and correlated as a single stacked array.
+    """
+
+    def __init__(self, split_coord=_SplitHalvesConsistency.Defaults.split_coord,
+                 neuroid_dim=XarrayDefaults.neuroid_dim, neuroid_coord=XarrayDefaults.neuroid_coord,
+                 aggregate=None, chunk_size=int(5e7)):
+        self._split_coord = split_coord
+        self._neuroid_dim = neuroid_dim
+        self._neuroid_coord = neuroid_coord
+        self._aggregate = aggregate
+        self._chunk_size = chunk_size
+        # same splits as the `CrossValidationSingle` in `_SplitHalvesConsistency`
+        self._split = Split(train_size=0.5, split_coord=split_coord,
+                            stratification_coord=None, unique_split_values=True)
+        self._correction = SpearmanBrownCorrection()
+
+    def applicable(self, assembly):
+        repetition_dims = assembly[self._split_coord].dims
+        return len(repetition_dims) == 1 and set(assembly.dims) == {repetition_dims[0], self._neuroid_dim}
+
+    def __call__(self, assembly):
+        repetition_dim = assembly[self._split_coord].dims[0]
+        cross_validation_values, splits = self._split.build_splits(assembly)
+        repetitions = cross_validation_values.values
+        repetition_codes = np.searchsorted(repetitions, assembly[self._split_coord].values)
+        stimulus_coords = [coord for coord, dims, values in walk_coords(assembly)
+                           if array_is_element(dims, repetition_dim) and coord != self._split_coord]
+        stimulus_codes, _ = factorize(*[assembly[coord].values for coord in stimulus_coords])
+        num_stimuli = stimulus_codes.max() + 1
+        # which repetitions are part of the first half (train) and second half (test) in every split
+        half_memberships = np.zeros((2, len(splits), len(repetitions)))
+        for split, (train_indices, test_indices) in enumerate(splits):
+            half_memberships[0, split, train_indices] = 1
+            half_memberships[1, split, test_indices] = 1
+
+        values = assembly.transpose(repetition_dim, self._neuroid_dim).values
+        consistencies = np.empty((len(splits), values.shape[1]))
+        neuroids_per_chunk = max(1, self._chunk_size // (num_stimuli * len(repetitions)))
+        for neuroid_start in range(0, values.shape[1], neuroids_per_chunk):
+            neuroids = slice(neuroid_start, neuroid_start + neuroids_per_chunk)
+            half_means = self._half_means(values[:, neuroids], stimulus_codes=stimulus_codes, num_stimuli=num_stimuli,
+                                          repetition_codes=repetition_codes, half_memberships=half_memberships)
+            consistencies[:, neuroids] = self._correlate(half_means[0], half_means[1])
+        consistencies = self._correction.correct(consistencies, n=2)
+
+        neuroid_order = np.argsort(assembly[self._neuroid_coord].values, kind='stable')  # same as correlation sorting
+        consistencies = Score(consistencies[:, neuroid_order],
+                              coords={**{'split': list(range(len(splits)))},
+                                      **{coord: (dims, values[neuroid_order])
+                                         for coord, dims, values in walk_coords(assembly)
+                                         if array_is_element(dims, self._neuroid_dim)}},
+                              dims=['split', self._neuroid_dim])
+        score = apply_aggregate(self._aggregate, consistencies) if self._aggregate is not None else consistencies
+        score = apply_aggregate(self._split.aggregate, score)
+        return score
+
+    @classmethod
+    def _half_means(cls, values, stimulus_codes, num_stimuli, repetition_codes, half_memberships):
+        """
+        :param values: matrix of `presentation x neuroid`
+        :param half_memberships: matrix of `half x split x repetition` indicating which repetitions belong to a half
+        :return: NaN-skipping means of every stimulus in every half of every split, `half x split x stimulus x neuroid`
+        """
+        num_repetitions = half_memberships.shape[-1]
+        values = values.astype(np.float64)
+        nans = np.isnan(values)
+        values[nans] = 0
+        # one segmented reduction for the sums and non-NaN counts of every stimulus x repetition cell
+        cell_codes = stimulus_codes * num_repetitions + repetition_codes
+        order = np.argsort(cell_codes, kind='stable')
+        sorted_codes = cell_codes[order]
+        segment_starts = np.concatenate([[0], np.flatnonzero(np.diff(sorted_codes)) + 1])
+        sums = np.zeros((num_stimuli * num_repetitions, values.shape[1]))
+        counts = np.zeros(sums.shape)
+        sums[sorted_codes[segment_starts]] = np.add.reduceat(values[order], segment_starts, axis=0)
+        counts[sorted_codes[segment_starts]] = np.add.reduceat(~nans[order], segment_starts, axis=0)
+        sums = sums.reshape(num_stimuli, num_repetitions, values.shape[1])
+        counts = counts.reshape(sums.shape)
+        # combine the repetitions of every half
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.einsum('hpr,srn->hpsn', half_memberships, sums) / \
+                   np.einsum('hpr,srn->hpsn', half_memberships, counts)
+
+    @classmethod
+    def _correlate(cls, half1, half2):
+        """
+        Pearson correlation across stimuli (axis 1) for every split and neuroid
+        """
+        half1 = half1 - half1.mean(axis=1, keepdims=True)
+        half2 = half2 - half2.mean(axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlations = (half1 * half2).sum(axis=1) / \
+                           np.sqrt((half1 ** 2).sum(axis=1) * (half2 ** 2).sum(axis=1))
+        return np.clip(correlations, -1, 1)
+
+
 class InternalConsistency(Ceiling):
     def __init__(self,
                  split_coord=_SplitHalvesConsistency.Defaults.split_coord, stimulus_coord=XarrayDefaults.stimulus_coord,
-                 neuroid_dim=XarrayDefaults.neuroid_dim, neuroid_coord=XarrayDefaults.neuroid_coord):
+                 neuroid_dim=XarrayDefaults.neuroid_dim, neuroid_coord=XarrayDefaults.neuroid_coord,
+                 vectorized=False):
+        """
+        :param vectorized: compute all splits at once with :class:`_VectorizedSplitHalvesConsistency`
+            for `presentation x neuroid` assemblies, instead of averaging and correlating split by split.
+            Opt-in since it handles missing values by averaging over the present repetitions of every half.
+        """
         consistency = SplitHalfConsistency(stimulus_coord=stimulus_coord, neuroid_dim=neuroid_dim,
                                            neuroid_coord=neuroid_coord)
         self._consistency = _SplitHalvesConsistency(consistency=consistency, split_coord=split_coord,
                                                     aggregate=consistency.aggregate)
+        self._vectorized_consistency = _VectorizedSplitHalvesConsistency(
+            split_coord=split_coord, neuroid_dim=neuroid_dim, neuroid_coord=neuroid_coord,
+            aggregate=consistency.aggregate) if vectorized else None
 
     def __call__(self, assembly):
+        if self._vectorized_consistency is not None and self._vectorized_consistency.applicable(assembly):
+            return self._vectorized_consistency(assembly)
         return self._consistency(assembly)
 
 
@@ -95,8 +210,8 @@ class SplitHalfConsistency:
 
 
 class RDMConsistency(Ceiling):
-    def __init__(self):
-        rdm = RDMMetric()
+    def __init__(self, condensed=False, dtype=None):
+        rdm = RDMMetric(condensed=condensed, dtype=dtype)
         self._consistency = _SplitHalvesConsistency(consistency=rdm)
 
     def __call__(self, assembly):
@@ -0,0 +1,79 @@
+import numpy as np
+from sklearn.decomposition import PCA
+from sklearn.random_projection import SparseRandomProjection
+
+from brainio_base.assemblies import NeuroidAssembly, array_is_element, walk_coords
+from brainscore.metrics.xarray_utils import Defaults as XarrayDefaults
+
+
+class SourceProjection:
+    """
+    Projects source assemblies (e.g. model activations) onto `n_components` sparse random directions
+    before they are passed to a metric.
+    Distances between stimuli are approximately preserved (Johnson-Lindenstrauss),
+    so regressions on the projection usually score close to the full features at a fraction of the cost;
+    scores do change though, which is why benchmarks only project when asked to.
+    Sources with at most `n_components` features are returned unchanged.
+    The projection of the most recent source per stimulus set is cached,
+    so benchmarks sharing a stimulus set (and the source, e.g. via an `ActivationsCache`) project only once.
+    """
+
+    def __init__(self, n_components=1000, random_state=0, neuroid_dim=XarrayDefaults.neuroid_dim,
+                 neuroid_coord=XarrayDefaults.neuroid_coord):
+        self._n_components = n_components
+        self._random_state = random_state
+        self._neuroid_dim = neuroid_dim
+        self._neuroid_coord = neuroid_coord
+        self._cache = {}
+
+    def __call__(self, source):
+        if len(source[self._neuroid_dim]) <= self._n_components:
+            return source
+        stimulus_set_name = source.attrs.get('stimulus_set_name')
+        values = source.values
+        # identify the source by its memory rather than the object, since e.g. `squeeze` creates new views
+        key = values.__array_interface__['data'][0], values.shape, values.strides, values.dtype
+        cached = self._cache.get(stimulus_set_name)
+        if cached is not None and cached[0] == key:
+            return cached[2]
+        projected = self._project(source)
+        self._cache[stimulus_set_name] = key, values, projected  # keep the values alive so the memory is not reused
+        return projected
+
+    def _project(self, source):
+        other_dims = [dim for dim in source.dims if dim != self._neuroid_dim]
+        source = source.transpose(*other_dims, self._neuroid_dim)
+        values = source.values.reshape(-1, source.shape[-1])
+        projection = SparseRandomProjection(n_components=self._n_components, dense_output=True,
+                                            random_state=self._random_state)
+        projected_values = projection.fit_transform(values).astype(values.dtype, copy=False)
+        projected_values = projected_values.reshape(source.shape[:-1] + (self._n_components,))
+        coords = {coord: (dims, coord_values) for coord, dims, coord_values in walk_coords(source)
+                  if not array_is_element(dims, self._neuroid_dim)}
+        coords[self._neuroid_coord] = self._neuroid_dim, np.arange(self._n_components)
+        projected = NeuroidAssembly(projected_values, coords=coords, dims=source.dims)
+        projected.attrs = source.attrs
+        return projected
+
+
+class TrainPCA:
+    """
+    Wraps a regression such that its source features are first reduced to `n_components` principal components.
+    The (randomized) PCA is fit on the training source only, test sources are projected with the same components.
+    """
+
+    def __init__(self, regression, n_components=1000, random_state=0):
+        self._regression = regression
+        self._n_components = n_components
+        self._random_state = random_state
+        self._pca = None
+
+    def fit(self, X, Y):
+        X = np.asarray(X)
+        n_components = min(self._n_components, *X.shape)
+        self._pca = PCA(n_components=n_components, svd_solver='randomized', random_state=self._random_state)
+        self._regression.fit(self._pca.fit_transform(X), Y)
+        return self
+
+    def predict(self, X):
+        return self._regression.predict(self._pca.transform(np.asarray(X)))
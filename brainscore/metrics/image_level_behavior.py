@@ -1,5 +1,4 @@
 import logging
-from collections import Counter
 
 import itertools
 import numpy as np
@@ -10,7 +9,7 @@ from scipy.stats import pearsonr
 from brainio_base.assemblies import walk_coords, DataAssembly
 from brainscore.metrics import Metric, Score
 from brainscore.metrics.transformations import apply_aggregate
-from brainscore.utils import fullname
+from brainscore.utils import fullname, map_parallel
 
 
 def I1(*args, **kwargs):
@@ -39,26 +38,36 @@ class _I(Metric):
             distractor images. This implementation computes the false-alarms rate per object, and then takes the mean.
     """
 
-    def __init__(self, collapse_distractors, normalize, repetitions=2):
+    def __init__(self, collapse_distractors, normalize, repetitions=2, executor=None, max_workers=None):
+        """
+        :param repetitions: number of split-halves of the target trials to score (and ceil) on.
+            The halves are drawn from one fixed-seed random stream,
+            so score and ceiling see identical halves and every repetition's halves do not depend on `repetitions`.
+        :param executor: if `'thread'` or `'process'`, the repetitions are evaluated in parallel
+            (see :meth:`brainscore.utils.map_parallel`). Scores are identical to the serial default.
+        :param max_workers: number of parallel workers when using an `executor`
+        """
         super().__init__()
         self._collapse_distractors = collapse_distractors
         self._normalize = normalize
         self._repetitions = repetitions
+        self._executor = executor
+        self._max_workers = max_workers
         self._logger = logging.getLogger(fullname(self))
 
     def __call__(self, source_probabilities, target):
-        return self._repeat(lambda random_state:
-                            self._call_single(source_probabilities, target, random_state=random_state))
-
-    def _call_single(self, source_probabilities, target, random_state):
         self.add_source_meta(source_probabilities, target)
         source_response_matrix = self.target_distractor_scores(source_probabilities)
         source_response_matrix = self.dprimes(source_response_matrix)
         if self._collapse_distractors:
             source_response_matrix = self.collapse_distractors(source_response_matrix)
 
-        target_half = self.generate_halves(target, random_state=random_state)[0]
-        target_response_matrix = self.build_response_matrix_from_responses(target_half)
+        target_halves = [halves[0] for halves in self.generate_half_indices(len(target))]
+        target_response_matrices = self.build_response_matrices_from_responses(target, target_halves)
+        return self._repeat(self._score_half, [(source_response_matrix, target_response_matrix)
+                                               for target_response_matrix in target_response_matrices])
+
+    def _score_half(self, source_response_matrix, target_response_matrix):
         target_response_matrix = self.dprimes(target_response_matrix)
         if self._collapse_distractors:
             target_response_matrix = self.collapse_distractors(target_response_matrix)
@@ -68,44 +77,54 @@ class _I(Metric):
         return correlation
 
     def ceiling(self, assembly, skipna=False):
-        return self._repeat(lambda random_state:
-                            self.compute_ceiling(assembly, random_state=random_state, skipna=skipna))
+        halves = list(itertools.chain(*self.generate_half_indices(len(assembly))))
+        response_matrices = self.build_response_matrices_from_responses(assembly, halves)
+        return self._repeat(self._half_consistency, [(half1, half2, skipna) for half1, half2 in
+                                                     zip(response_matrices[0::2], response_matrices[1::2])])
 
-    def compute_ceiling(self, assembly, random_state, skipna=False):
-        dprime_halves = []
-        for half in self.generate_halves(assembly, random_state=random_state):
-            half = self.build_response_matrix_from_responses(half)
-            half = self.dprimes(half)
-            dprime_halves.append(half)
-        return self.correlate(*dprime_halves, skipna=skipna)
+    def _half_consistency(self, half1, half2, skipna=False):
+        return self.correlate(self.dprimes(half1), self.dprimes(half2), skipna=skipna)
 
     def build_response_matrix_from_responses(self, responses):
-        num_choices = [(image_id, choice) for image_id, choice in zip(responses['image_id'].values, responses.values)]
-        num_choices = Counter(num_choices)
-        num_objects = [[(image_id, sample_obj), (image_id, dist_obj)] for image_id, sample_obj, dist_obj in zip(
-            responses['image_id'].values, responses['sample_obj'].values, responses['dist_obj'].values)]
-        num_objects = Counter(itertools.chain(*num_objects))
-
+        return self.build_response_matrices_from_responses(responses, [np.arange(len(responses))])[0]
+
+    def build_response_matrices_from_responses(self, responses, subsets):
+        """
+        Builds the response matrices of many subsets of the trials (e.g. split-halves) in a single counting pass.
+        :param subsets: a list of index arrays into `responses`
+        :return: a list with the response matrix of every subset, all over the images and choices in `responses`
+        """
         choices = np.unique(responses)
-        image_ids, indices = np.unique(responses['image_id'], return_index=True)
+        image_ids, indices, image_codes = np.unique(responses['image_id'].values, return_index=True,
+                                                    return_inverse=True)
         truths = responses['truth'].values[indices]
         image_dim = responses['image_id'].dims
         coords = {**{coord: (dims, value) for coord, dims, value in walk_coords(responses)},
                   **{'choice': ('choice', choices)}}
         coords = {coord: (dims, value if dims != image_dim else value[indices])  # align image_dim coords with indices
                   for coord, (dims, value) in coords.items()}
-        response_matrix = np.zeros((len(image_ids), len(choices)))
-        for (image_index, image_id), (choice_index, choice) in itertools.product(
-                enumerate(image_ids), enumerate(choices)):
-            if truths[image_index] == choice:  # object == choice, ignore
-                p = np.nan
-            else:
-                # divide by number of times where object was one of the two choices (target or distractor)
-                p = (num_choices[(image_id, choice)] / num_objects[(image_id, choice)]) \
-                    if num_objects[(image_id, choice)] > 0 else np.nan
-            response_matrix[image_index, choice_index] = p
-        response_matrix = DataAssembly(response_matrix, coords=coords, dims=responses.dims + ('choice',))
-        return response_matrix
+
+        # count per (subset, image, choice) cell on flattened indices
+        num_cells = len(image_ids) * len(choices)
+        trials = np.concatenate(subsets).astype(int)
+        subset_offsets = np.repeat(np.arange(len(subsets)) * num_cells, [len(subset) for subset in subsets])
+        image_cells = image_codes * len(choices)
+        choice_cells = image_cells + np.searchsorted(choices, responses.values)
+        num_choices = np.bincount(subset_offsets + choice_cells[trials], minlength=len(subsets) * num_cells)
+        # number of times where object was one of the two choices (target or distractor)
+        num_objects = np.zeros(len(subsets) * num_cells, dtype=int)
+        for objects in [responses['sample_obj'].values, responses['dist_obj'].values]:
+            object_codes = np.clip(np.searchsorted(choices, objects), 0, len(choices) - 1)
+            is_choice = (choices[object_codes] == objects)[trials]  # objects that were never chosen have no cell
+            object_cells = subset_offsets + (image_cells + object_codes)[trials]
+            num_objects += np.bincount(object_cells[is_choice], minlength=len(subsets) * num_cells)
+        num_choices, num_objects = num_choices.reshape(len(subsets), len(image_ids), len(choices)), \
+                                   num_objects.reshape(len(subsets), len(image_ids), len(choices))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            response_matrices = np.where(num_objects > 0, num_choices / num_objects, np.nan)
+        response_matrices[:, truths[:, np.newaxis] == choices[np.newaxis, :]] = np.nan  # object == choice, ignore
+        return [DataAssembly(response_matrix, coords=coords, dims=responses.dims + ('choice',))
+                for response_matrix in response_matrices]
 
     def dprimes(self, response_matrix, cap=5):
         dprime_scores = self.dprime(response_matrix)
@@ -120,6 +139,19 @@ class _I(Metric):
         return response_matrix.mean(dim='choice', skipna=True)
 
     def target_distractor_scores(self, object_probabilities):
+        if not self._unique_images(object_probabilities):
+            return self._target_distractor_scores_per_cell(object_probabilities)
+        values, image_truths, choice_values, restore = self._image_choice_matrix(object_probabilities)
+        truth_columns = self._codes(choice_values, image_truths)
+        assert (truth_columns >= 0).all(), "every image's truth must be one of the choices"
+        # probability that something else was chosen rather than object
+        p_object = values[np.arange(len(values)), truth_columns][:, np.newaxis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = values / (values + p_object)
+        result[np.arange(len(values)), truth_columns] = np.nan  # object == choice, ignore
+        return restore(result)
+
+    def _target_distractor_scores_per_cell(self, object_probabilities):
         cached_object_probabilities = self._build_index(object_probabilities, ['image_id', 'choice'])
 
         def apply(p_choice, image_id, truth, choice, **_):
@@ -134,6 +166,22 @@ class _I(Metric):
         return result
 
     def dprime(self, response_matrix):
+        if not self._unique_images(response_matrix):
+            return self._dprime_per_cell(response_matrix)
+        values, image_truths, choice_values, restore = self._image_choice_matrix(response_matrix)
+        truths, truth_indices = np.unique(image_truths, return_inverse=True)
+        # false alarms rate per object: mean over all images of truth `choice` of choosing the image's truth
+        truth_means = self._group_nanmean(values, truth_indices, len(truths))  # truths x choices
+        choice_rows = self._codes(truths, choice_values)  # choice -> row in truth_means
+        truth_columns = self._codes(choice_values, truths)[truth_indices]  # image -> column of its truth
+        valid = (choice_rows >= 0)[np.newaxis, :] & (truth_columns >= 0)[:, np.newaxis]
+        false_alarms_rate_objects = np.where(valid, truth_means[choice_rows[np.newaxis, :],
+                                                                truth_columns[:, np.newaxis]], np.nan)
+        hit_rate = 1 - values
+        dprime = self.z_score(hit_rate) - self.z_score(false_alarms_rate_objects)
+        return restore(dprime)
+
+    def _dprime_per_cell(self, response_matrix):
         truth_choice_values = self._build_index(response_matrix, ['truth', 'choice'])
 
         def apply(false_alarms_rate_images, choice, truth, **_):
@@ -150,8 +198,56 @@ class _I(Metric):
         return scipy.stats.norm.ppf(value)
 
     def subtract_mean(self, scores):
-        result = scores.multi_dim_apply(['truth', 'choice'], lambda group, **_: group - np.nanmean(group))
-        return result
+        if not self._unique_images(scores):
+            return scores.multi_dim_apply(['truth', 'choice'], lambda group, **_: group - np.nanmean(group))
+        values, image_truths, _, restore = self._image_choice_matrix(scores)
+        truths, truth_indices = np.unique(image_truths, return_inverse=True)
+        truth_means = self._group_nanmean(values, truth_indices, len(truths))
+        return restore(values - truth_means[truth_indices])
+
+    def _unique_images(self, assembly):
+        image_ids = assembly['image_id'].values
+        # the vectorized computations need one row per image; duplicate images are grouped by `multi_dim_apply`
+        return len(assembly.dims) == 2 and assembly['image_id'].dims != assembly['choice'].dims and \
+               len(np.unique(image_ids)) == len(image_ids)
+
+    def _image_choice_matrix(self, assembly):
+        """
+        :return: the values as an `image x choice` matrix, the truth of every row's image, the choice values,
+            and a function re-packaging an `image x choice` matrix with the coords and dims of `assembly`
+        """
+        image_dim, choice_dim = assembly['image_id'].dims[0], assembly['choice'].dims[0]
+        image_choice = assembly.transpose(image_dim, choice_dim)
+        values = image_choice.values.astype(float)
+
+        def restore(result):
+            result = type(assembly)(result, coords={coord: (dims, coord_values) for coord, dims, coord_values
+                                                    in walk_coords(image_choice)}, dims=image_choice.dims)
+            return result.transpose(*assembly.dims)
+
+        return values, image_choice['truth'].values, image_choice['choice'].values, restore
+
+    @staticmethod
+    def _codes(values, query_values):
+        """
+        :return: the index of every element of `query_values` in the unique `values`, -1 for missing elements
+        """
+        order = np.argsort(values, kind='stable')
+        positions = order[np.clip(np.searchsorted(values, query_values, sorter=order), 0, len(values) - 1)]
+        return np.where(values[positions] == query_values, positions, -1)
+
+    @staticmethod
+    def _group_nanmean(values, group_indices, num_groups):
+        """
+        :return: the NaN-ignoring mean over the rows of every group, per column
+        """
+        non_nan = ~np.isnan(values)
+        membership = np.zeros((num_groups, len(values)))
+        membership[group_indices, np.arange(len(values))] = 1
+        sums = membership @ np.where(non_nan, values, 0)
+        counts = membership @ non_nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
 
     @classmethod
     def correlate(cls, source_response_matrix, target_response_matrix, skipna=False):
@@ -175,11 +271,18 @@ class _I(Metric):
         error = scores.std('split')
         return Score([center, error], coords={'aggregation': ['center', 'error']}, dims=['aggregation'])
 
-    def generate_halves(self, assembly, random_state):
-        indices = list(range(len(assembly)))
-        random_state.shuffle(indices)
-        halves = assembly[indices[:int(len(indices) / 2)]], assembly[indices[int(len(indices) / 2):]]
-        return halves
+    def generate_half_indices(self, num_trials):
+        """
+        :return: the trial indices of both halves for every repetition, drawn in sequence from a fixed-seed stream
+        """
+        random_state = self._initialize_random_state()
+        half_indices = []
+        for repetition in range(self._repetitions):
+            indices = list(range(num_trials))
+            random_state.shuffle(indices)
+            indices = np.array(indices, dtype=int)
+            half_indices.append((indices[:int(num_trials / 2)], indices[int(num_trials / 2):]))
+        return half_indices
 
     def _build_index(self, assembly, coords):
         np.testing.assert_array_equal(list(itertools.chain(*[assembly[coord].dims for coord in coords])), assembly.dims)
@@ -194,11 +297,13 @@ class _I(Metric):
                 result[coord_values] = value
         return result
 
-    def _repeat(self, func):
-        random_state = self._initialize_random_state()
-        repetitions = list(range(self._repetitions))
-        scores = [func(random_state=random_state) for repetition in repetitions]
-        score = Score(scores, coords={'split': repetitions}, dims=['split'])
+    def _repeat(self, func, args_list):
+        if self._executor is None:
+            scores = [func(*args) for args in args_list]
+        else:
+            scores = map_parallel(func, args_list, executor=self._executor, max_workers=self._max_workers,
+                                  desc='repetitions')
+        score = Score(scores, coords={'split': list(range(len(scores)))}, dims=['split'])
         return apply_aggregate(self.aggregate, score)
 
     def _initialize_random_state(self):
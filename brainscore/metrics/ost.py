@@ -3,8 +3,8 @@ from collections import OrderedDict
 
 import numpy as np
 from numpy.random.mtrand import RandomState
-from scipy.interpolate import interp1d
-from scipy.optimize import fsolve
+from scipy.optimize import minimize
+from scipy.special import log_softmax
 from scipy.stats import spearmanr
 from tqdm import tqdm
 
@@ -12,12 +12,32 @@ from brainio_base.assemblies import walk_coords, array_is_element, BehavioralAss
 from brainscore.metrics import Metric, Score
 from brainscore.metrics.image_level_behavior import I1
 from brainscore.metrics.transformations import CrossValidation
-from brainscore.utils import fullname
+from brainscore.utils import fullname, map_parallel
 
 
 class OSTCorrelation(Metric):
-    def __init__(self):
+    def __init__(self, classifier=None, warm_start=False, executor=None, max_workers=None):
+        """
+        :param classifier: a function returning a new probabilities classifier for every time bin,
+            `TFProbabilitiesClassifier` by default. :class:`LogisticProbabilitiesClassifier` optimizes the same objective
+            in NumPy/SciPy without requiring TensorFlow.
+        :param warm_start: train a single classifier across the time bins of a split,
+            starting every bin's fit from the previous bin's solution.
+            `classifier` has to accept `warm_start=True`, e.g. :class:`LogisticProbabilitiesClassifier`.
+        :param executor: if `'thread'` or `'process'`, the classifiers of all time bins are trained in parallel
+            (see :meth:`brainscore.utils.map_parallel`) instead of stopping once every image reached its threshold.
+            Both find the same threshold crossings.
+            `TFProbabilitiesClassifier` resets TensorFlow's global default graph and thus only supports `'process'`.
+        :param max_workers: number of parallel workers when using an `executor`
+        """
+        assert not (warm_start and executor is not None), "warm-starting requires the time bins to run in order"
+        self._classifier = classifier or TFProbabilitiesClassifier
+        assert not (executor == 'thread' and self._classifier is TFProbabilitiesClassifier), \
+            "TFProbabilitiesClassifier cannot be trained in parallel threads, use executor='process'"
         self._cross_validation = CrossValidation(stratification_coord=None, splits=10, test_size=0.1)
+        self._warm_start = warm_start
+        self._executor = executor
+        self._max_workers = max_workers
         self._i1 = I1()
         self._predicted_osts, self._target_osts = [], []
 
@@ -35,45 +55,52 @@ class OSTCorrelation(Metric):
         return source.isel(presentation=[np.where(source[on].values == key)[0][0] for key in target[on].values])
 
     def compute_osts(self, train_source, test_source, test_osts):
-        last_osts, hit_osts = [None] * len(test_osts), [None] * len(test_osts)
-        for time_bin_start in tqdm(sorted(set(train_source['time_bin_start'].values)), desc='time_bins'):
-            time_train_source = train_source.sel(time_bin_start=time_bin_start).squeeze('time_bin_end')
-            time_test_source = test_source.sel(time_bin_start=time_bin_start).squeeze('time_bin_end')
-            time_train_source = time_train_source.transpose('presentation', 'neuroid')
-            time_test_source = time_test_source.transpose('presentation', 'neuroid')
-
-            classifier = TFProbabilitiesClassifier()
-            classifier.fit(time_train_source, time_train_source['image_label'])
-            prediction_probabilities = classifier.predict_proba(time_test_source)
-            classifier.close()
-            source_i1 = self.i1(prediction_probabilities)
+        time_bin_starts = sorted(set(train_source['time_bin_start'].values))
+        if self._executor is not None:
+            source_i1s = map_parallel(self.time_bin_i1, [(train_source, test_source, time_bin_start)
+                                                         for time_bin_start in time_bin_starts],
+                                      executor=self._executor, max_workers=self._max_workers, desc='time_bins')
+            for source_i1 in source_i1s:
+                assert all(source_i1['image_id'].values == test_osts['image_id'].values)
+            source_i1s = np.stack([source_i1.values for source_i1 in source_i1s], axis=1)  # image x time_bin
+            return interpolate_osts(source_i1s, np.array(time_bin_starts), test_osts['i1'].values)
+
+        # time and I1 of the highest bin below threshold so far (last) and of the first bin reaching it (hit)
+        threshold_i1s = test_osts['i1'].values
+        last_times, last_i1s = np.full(len(test_osts), np.nan), np.full(len(test_osts), np.nan)
+        hit_times, hit_i1s = np.full(len(test_osts), np.nan), np.full(len(test_osts), np.nan)
+        classifier = self._classifier(warm_start=True) if self._warm_start else None
+        for time_bin_start in tqdm(time_bin_starts, desc='time_bins'):
+            source_i1 = self.time_bin_i1(train_source, test_source, time_bin_start, classifier=classifier)
             assert all(source_i1['image_id'].values == test_osts['image_id'].values)
-            for i, (image_source_i1, threshold_i1) in enumerate(zip(
-                    source_i1.values, test_osts['i1'].values)):
-                if hit_osts[i] is None:
-                    if image_source_i1 < threshold_i1 and (last_osts[i] is None or last_osts[i][1] < image_source_i1):
-                        last_osts[i] = time_bin_start, image_source_i1
-                    if image_source_i1 >= threshold_i1:
-                        hit_osts[i] = time_bin_start, image_source_i1
-            if not any(hit_ost is None for hit_ost in hit_osts):
+            source_i1 = source_i1.values
+            not_hit = np.isnan(hit_times)
+            with np.errstate(invalid='ignore'):  # NaN I1s neither update last nor hit
+                update_last = not_hit & (source_i1 < threshold_i1s) & (np.isnan(last_i1s) | (last_i1s < source_i1))
+                update_hit = not_hit & (source_i1 >= threshold_i1s)
+            last_times[update_last], last_i1s[update_last] = time_bin_start, source_i1[update_last]
+            hit_times[update_hit], hit_i1s[update_hit] = time_bin_start, source_i1[update_hit]
+            if not np.isnan(hit_times).any():
                 break
+        return solve_osts(last_times, last_i1s, hit_times, hit_i1s, threshold_i1s)
 
-        # interpolate
-        predicted_osts = np.empty(len(test_osts), dtype=np.float)
-        predicted_osts[:] = np.nan
-        for i, (last_ost, hit_ost) in enumerate(zip(last_osts, hit_osts)):
-            if hit_ost is None:
-                predicted_osts[i] = np.nan
-                continue
-            (hit_ost_time, hit_ost_i1) = hit_ost
-            if last_ost is None:
-                predicted_osts[i] = hit_ost_time
-                continue
-            (last_ost_time, last_ost_i1) = last_ost
-            fit = interp1d([last_ost_time, hit_ost_time], [last_ost_i1, hit_ost_i1], fill_value='extrapolate')
-            ost = fsolve(lambda xs: [fit(x) - test_osts['i1'].values[i] for x in xs], x0=hit_ost_time)[0]
-            predicted_osts[i] = ost
-        return predicted_osts
+    def time_bin_i1(self, train_source, test_source, time_bin_start, classifier=None):
+        """
+        Trains a classifier on the train source of one time bin and computes the I1 of its test predictions.
+        :param classifier: an existing classifier to re-fit, a new one is created by default
+        """
+        time_train_source = train_source.sel(time_bin_start=time_bin_start).squeeze('time_bin_end')
+        time_test_source = test_source.sel(time_bin_start=time_bin_start).squeeze('time_bin_end')
+        time_train_source = time_train_source.transpose('presentation', 'neuroid')
+        time_test_source = time_test_source.transpose('presentation', 'neuroid')
+
+        close = classifier is None
+        classifier = classifier or self._classifier()
+        classifier.fit(time_train_source, time_train_source['image_label'])
+        prediction_probabilities = classifier.predict_proba(time_test_source)
+        if close:
+            classifier.close()
+        return self.i1(prediction_probabilities)
 
     def correlate(self, predicted_osts, target_osts):
         non_nan = np.logical_and(~np.isnan(predicted_osts), ~np.isnan(target_osts))
@@ -90,6 +117,153 @@ class OSTCorrelation(Metric):
         return response_matrix
 
 
+def labels_to_indices(labels):
+    """
+    :return: the index of every label, in order of first appearance, and the mapping from index to label
+    """
+    label2index = OrderedDict()
+    indices = []
+    for label in labels:
+        if label not in label2index:
+            label2index[label] = (max(label2index.values()) + 1) if len(label2index) > 0 else 0
+        indices.append(label2index[label])
+    index2label = OrderedDict((index, label) for label, index in label2index.items())
+    return np.array(indices), index2label
+
+
+def package_probabilities(proba, X, label_mapping):
+    # we take only the 0th dimension because the 1st dimension is just the features
+    X_coords = {coord: (dims, value) for coord, dims, value in walk_coords(X)
+                if array_is_element(dims, X.dims[0])}
+    proba = BehavioralAssembly(proba,
+                               coords={**X_coords, **{'choice': list(label_mapping.values())}},
+                               dims=[X.dims[0], 'choice'])
+    return proba
+
+
+def linear_root(last_time, last_i1, hit_time, hit_i1, threshold_i1):
+    """
+    :return: the time at which the line through `(last_time, last_i1)` and `(hit_time, hit_i1)` reaches `threshold_i1`
+    """
+    return last_time + (threshold_i1 - last_i1) * (hit_time - last_time) / (hit_i1 - last_i1)
+
+
+def interpolate_osts(source_i1s, time_bin_starts, threshold_i1s):
+    """
+    Finds every image's object solution time from its I1 over all time bins at once.
+    The hit is the first time bin in which the I1 reaches the image's threshold,
+    the last time bin is the one with the highest (non-NaN) I1 before the hit, the first one in case of ties.
+    The threshold crossing is linearly interpolated between the two;
+    images without a last time bin use the hit time, images without a hit have no OST.
+    :param source_i1s: an `image x time_bin` matrix of I1 values, with time bins ordered as `time_bin_starts`
+    :param threshold_i1s: the I1 threshold of every image
+    :return: the predicted OST of every image
+    """
+    with np.errstate(invalid='ignore'):
+        hits = source_i1s >= threshold_i1s[:, np.newaxis]  # NaN never hits
+    has_hit = hits.any(axis=1)
+    hit_bins = hits.argmax(axis=1)
+    before_hit = np.arange(source_i1s.shape[1])[np.newaxis, :] < hit_bins[:, np.newaxis]
+    candidate_i1s = np.where(before_hit & ~np.isnan(source_i1s), source_i1s, -np.inf)
+    last_bins = candidate_i1s.argmax(axis=1)
+    has_last = np.isfinite(candidate_i1s[np.arange(len(source_i1s)), last_bins])
+
+    images = np.arange(len(source_i1s))
+    hit_times = np.where(has_hit, time_bin_starts[hit_bins], np.nan)
+    hit_i1s = np.where(has_hit, source_i1s[images, hit_bins], np.nan)
+    last_times = np.where(has_last, time_bin_starts[last_bins], np.nan)
+    last_i1s = np.where(has_last, source_i1s[images, last_bins], np.nan)
+    return solve_osts(last_times, last_i1s, hit_times, hit_i1s, threshold_i1s)
+
+
+def solve_osts(last_times, last_i1s, hit_times, hit_i1s, threshold_i1s):
+    """
+    Linearly interpolates every image's threshold crossing between its last and hit time bin.
+    All arguments are arrays over images, with NaN times for images without a last or hit time bin respectively.
+    :return: the predicted OST of every image: the interpolated crossing, the hit time for images without a last
+        time bin, and NaN for images without a hit
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        interpolated_osts = linear_root(last_times, last_i1s, hit_times, hit_i1s, threshold_i1s)
+    return np.where(np.isnan(last_times), hit_times, interpolated_osts).astype(float)
+
+
+class LogisticProbabilitiesClassifier:
+    """
+    Multinomial logistic regression with the objective of :class:`TFProbabilitiesClassifier`
+    (mean softmax cross-entropy plus `fc_weight_decay / 2` times the squared L2 norm of weights and biases,
+    on z-scored features), minimized with L-BFGS on the full training set in NumPy/SciPy.
+    The objective is convex, so there is no dependence on initialization, learning rate or batch order.
+    """
+
+    def __init__(self, fc_weight_decay=0.463, zscore_feats=True, tol=1e-6, max_iter=1000, warm_start=False):
+        """
+        :param fc_weight_decay: regularization coefficient (inverse of sklearn C)
+        :param zscore_feats: whether to zscore model features
+        :param tol: tolerance of the L-BFGS gradient and loss convergence criteria
+        :param max_iter: maximum number of L-BFGS iterations
+        :param warm_start: start every `fit` from the solution of the previous one (if the dimensions match)
+        """
+        self._fc_weight_decay = fc_weight_decay
+        self._zscore_feats = zscore_feats
+        self._tol = tol
+        self._max_iter = max_iter
+        self._warm_start = warm_start
+        self._scaler = None
+        self._parameters = None
+        self._logger = logging.getLogger(fullname(self))
+
+    def _loss(self, parameters, X, Y_onehot):
+        num_features, num_classes = X.shape[1], Y_onehot.shape[1]
+        weights, biases = parameters[:-num_classes].reshape(num_features, num_classes), parameters[-num_classes:]
+        log_probabilities = log_softmax(X @ weights + biases, axis=1)
+        classification_error = -(Y_onehot * log_probabilities).sum() / len(X)
+        reg_loss = self._fc_weight_decay / 2 * (parameters @ parameters)
+        # gradient of the mean cross-entropy w.r.t. the logits
+        logits_gradient = (np.exp(log_probabilities) - Y_onehot) / len(X)
+        gradient = np.concatenate([(X.T @ logits_gradient).flatten(), logits_gradient.sum(axis=0)]) \
+                   + self._fc_weight_decay * parameters
+        return classification_error + reg_loss, gradient
+
+    def fit(self, X, Y):
+        """
+        Fits the parameters to the data
+        :param X: Source data, first dimension is examples
+        :param Y: Target data, first dimension is examples
+        """
+        if self._zscore_feats:
+            import sklearn
+            self._scaler = sklearn.preprocessing.StandardScaler().fit(X)
+            X = self._scaler.transform(X)
+        X = np.asarray(X, dtype=np.float64)
+        assert X.ndim == 2, 'Input matrix rank should be 2.'
+        Y, self._label_mapping = labels_to_indices(Y.values)
+        num_classes = len(self._label_mapping)
+        Y_onehot = np.zeros((len(Y), num_classes))
+        Y_onehot[np.arange(len(Y)), Y] = 1
+        initial_parameters = np.zeros((X.shape[1] + 1) * num_classes)
+        if self._warm_start and self._parameters is not None and self._parameters.shape == initial_parameters.shape:
+            initial_parameters = self._parameters
+        result = minimize(self._loss, initial_parameters, args=(X, Y_onehot), jac=True,
+                          method='L-BFGS-B', options={'maxiter': self._max_iter, 'gtol': self._tol, 'ftol': self._tol})
+        self._logger.debug(f"{result.message} after {result.nit} iterations, loss {result.fun:.4f}")
+        self._parameters = result.x
+        self._weights = result.x[:-num_classes].reshape(X.shape[1], num_classes)
+        self._biases = result.x[-num_classes:]
+
+    def predict_proba(self, X):
+        assert len(X.shape) == 2, "expected 2-dimensional input"
+        scaled_X = self._scaler.transform(X) if self._zscore_feats else np.asarray(X)
+        proba = np.exp(log_softmax(scaled_X @ self._weights + self._biases, axis=1))
+        return package_probabilities(proba, X, self._label_mapping)
+
+    def close(self):
+        """
+        Nothing to release, for compatibility with :class:`TFProbabilitiesClassifier`
+        """
+        pass
+
+
 class TFProbabilitiesClassifier:
     def __init__(self,
                  init_lr=1e-4,
@@ -271,14 +445,7 @@ class TFProbabilitiesClassifier:
             self._sess.run(init_op)
 
     def labels_to_indices(self, labels):
-        label2index = OrderedDict()
-        indices = []
-        for label in labels:
-            if label not in label2index:
-                label2index[label] = (max(label2index.values()) + 1) if len(label2index) > 0 else 0
-            indices.append(label2index[label])
-        index2label = OrderedDict((index, label) for label, index in label2index.items())
-        return np.array(indices), index2label
+        return labels_to_indices(labels)
 
     def fit(self, X, Y):
         """
@@ -329,13 +496,7 @@ class TFProbabilitiesClassifier:
                 softmax = self._sess.run([tf.nn.softmax(self._predictions)], feed_dict=feed_dict)
                 preds.append(np.squeeze(softmax))
             proba = np.concatenate(preds, axis=0)
-        # we take only the 0th dimension because the 1st dimension is just the features
-        X_coords = {coord: (dims, value) for coord, dims, value in walk_coords(X)
-                    if array_is_element(dims, X.dims[0])}
-        proba = BehavioralAssembly(proba,
-                                   coords={**X_coords, **{'choice': list(self._label_mapping.values())}},
-                                   dims=[X.dims[0], 'choice'])
-        return proba
+        return package_probabilities(proba, X, self._label_mapping)
 
     def close(self):
         """
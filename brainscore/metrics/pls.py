@@ -0,0 +1,68 @@
+import numpy as np
+
+
+class KernelPLSRegression:
+    """
+    Multi-target PLS regression without scaling, equivalent to
+    `sklearn.cross_decomposition.PLSRegression(scale=False)` but computed in closed form.
+    Following the kernel algorithm of Dayal & MacGregor (1997), only the cross-covariance matrix `X^T Y` is deflated;
+    each component's weights are the leading singular vector of the deflated cross-covariance,
+    so there is neither an iterative inner loop nor a deflated copy of X or Y.
+    Computations run in `dtype` (float32 by default) except for the small eigendecompositions.
+    """
+
+    def __init__(self, n_components=25, dtype=np.float32):
+        self.n_components = n_components
+        self.dtype = dtype
+
+    def fit(self, X, Y):
+        X, Y = np.asarray(X, dtype=self.dtype), np.asarray(Y, dtype=self.dtype)
+        squeeze = Y.ndim == 1
+        if squeeze:
+            Y = Y[:, np.newaxis]
+        self._x_mean, self._y_mean = X.mean(axis=0), Y.mean(axis=0)
+        X = X - self._x_mean
+        XtY = X.T @ (Y - self._y_mean)
+        # scores that are negligible relative to the total variance of X signal that X is fully explained
+        min_tt = np.finfo(self.dtype).eps * np.sum(X ** 2, dtype=np.float64)
+
+        n_features, n_targets = XtY.shape
+        R = np.zeros((n_features, self.n_components), dtype=self.dtype)  # x_rotations: scores t = X @ r
+        P = np.zeros((n_features, self.n_components), dtype=self.dtype)  # x_loadings
+        Q = np.zeros((n_targets, self.n_components), dtype=self.dtype)  # y_loadings
+        for component in range(self.n_components):
+            w = _leading_left_singular_vector(XtY)
+            r = w - R[:, :component] @ (P[:, :component].T @ w)
+            t = X @ r
+            tt = t @ t
+            if tt <= min_tt:
+                break
+            p = (X.T @ t) / tt
+            q = (XtY.T @ r) / tt
+            XtY -= tt * np.outer(p, q)
+            R[:, component], P[:, component], Q[:, component] = r, p, q
+        self.coef_ = R @ Q.T  # n_features x n_targets
+        self._squeeze = squeeze
+        return self
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=self.dtype)
+        prediction = (X - self._x_mean) @ self.coef_ + self._y_mean
+        return prediction[:, 0] if self._squeeze else prediction
+
+
+def _leading_left_singular_vector(matrix):
+    # the eigendecomposition of the smaller Gram matrix is much cheaper than a full SVD of the cross-covariance
+    n_rows, n_columns = matrix.shape
+    if n_columns == 1:
+        vector = matrix[:, 0]
+    elif n_columns <= n_rows:
+        gram = (matrix.T @ matrix).astype(np.float64)
+        _, eigenvectors = np.linalg.eigh(gram)
+        vector = matrix @ eigenvectors[:, -1].astype(matrix.dtype)
+    else:
+        gram = (matrix @ matrix.T).astype(np.float64)
+        _, eigenvectors = np.linalg.eigh(gram)
+        vector = eigenvectors[:, -1].astype(matrix.dtype)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
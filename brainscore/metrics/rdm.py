@@ -1,9 +1,9 @@
 import numpy as np
-from scipy.stats import spearmanr
+from scipy.stats import spearmanr, rankdata
 
 from brainio_base.assemblies import DataAssembly, walk_coords
 from brainscore.metrics.transformations import TestOnlyCrossValidation
-from brainscore.metrics.xarray_utils import Defaults as XarrayDefaults
+from brainscore.metrics.xarray_utils import Defaults as XarrayDefaults, resolve_dtype
 
 
 class RDMCrossValidated:
@@ -14,8 +14,21 @@ class RDMCrossValidated:
     """
 
     def __init__(self, neuroid_dim=XarrayDefaults.neuroid_dim, comparison_coord=XarrayDefaults.stimulus_coord,
-                 crossvalidation_kwargs=None):
-        self._metric = RDMMetric(neuroid_dim=neuroid_dim, comparison_coord=comparison_coord)
+                 crossvalidation_kwargs=None, condensed=False, dtype=None, precompute=False):
+        """
+        :param dtype: precision of the `RDM`s, `XarrayDefaults.dtype` or float64 if not given
+        :param precompute: compute the full-stimulus correlation matrix of every assembly once
+            and index the `RDM`s of each split from it (see :class:`PrecomputedRDM`).
+            The target assembly's matrix is kept across calls, so that scoring many models against the same data
+            computes the target `RDM` only once. Scores are identical to the split-wise computation.
+        """
+        self._metric = RDMMetric(neuroid_dim=neuroid_dim, comparison_coord=comparison_coord,
+                                 condensed=condensed, dtype=dtype)
+        self._neuroid_dim = neuroid_dim
+        self._comparison_coord = comparison_coord
+        self._dtype = dtype
+        self._precompute = precompute
+        self._target_rdm = None, None, None  # assembly, its values, precomputed rdm
         crossvalidation_defaults = dict(test_size=.9)  # leave 10% out
         crossvalidation_kwargs = {**crossvalidation_defaults, **(crossvalidation_kwargs or {})}
         self._cross_validation = TestOnlyCrossValidation(**crossvalidation_kwargs)
@@ -26,8 +39,75 @@ class RDMCrossValidated:
         :param brainscore.assemblies.NeuroidAssembly assembly2:
         :return: brainscore.assemblies.DataAssembly
         """
+        if not self._precompute or not all(PrecomputedRDM.applicable(assembly, self._neuroid_dim,
+                                                                     self._comparison_coord)
+                                           for assembly in [assembly1, assembly2]):
+            return self._cross_validation(assembly1, assembly2, apply=self._metric)
+        dtype = resolve_dtype(self._dtype, default=np.float64)
+        rdm1 = PrecomputedRDM(assembly1, neuroid_dim=self._neuroid_dim, comparison_coord=self._comparison_coord,
+                              dtype=dtype)
+        # the cache holds on to the target, so its identity cannot be taken over by another assembly
+        cached_assembly, cached_values, rdm2 = self._target_rdm
+        if cached_assembly is not assembly2 or cached_values is not assembly2.values or rdm2.dtype != dtype:
+            rdm2 = PrecomputedRDM(assembly2, neuroid_dim=self._neuroid_dim, comparison_coord=self._comparison_coord,
+                                  dtype=dtype)
+            self._target_rdm = assembly2, assembly2.values, rdm2
+        return self._cross_validation(assembly1, assembly2, apply=PrecomputedRDMSimilarity(
+            rdm1, rdm2, comparison_coord=self._comparison_coord))
+
+
+class PrecomputedRDM:
+    """
+    Holds the full `stimulus x stimulus` correlation matrix of an assembly
+    from which the condensed `RDM` of any subset of its stimuli is indexed.
+    """
 
-        return self._cross_validation(assembly1, assembly2, apply=self._metric)
+    def __init__(self, assembly, neuroid_dim=XarrayDefaults.neuroid_dim,
+                 comparison_coord=XarrayDefaults.stimulus_coord, dtype=np.float64):
+        stimulus_dim = [dim for dim in assembly.dims if dim != neuroid_dim][0]
+        comparison_values = assembly[comparison_coord].values
+        indices = np.argsort(comparison_values)
+        self._comparison_values = comparison_values[indices]
+        values = normalize_rows(assembly.transpose(stimulus_dim, neuroid_dim).values[indices], dtype=dtype)
+        self._correlations = values @ values.T
+        np.fill_diagonal(self._correlations, 1)  # exact self-correlations despite rounding in lower precisions
+        self.dtype = dtype
+
+    @classmethod
+    def applicable(cls, assembly, neuroid_dim, comparison_coord):
+        stimulus_dims = [dim for dim in assembly.dims if dim != neuroid_dim]
+        return len(assembly.dims) == 2 and len(stimulus_dims) == 1 and \
+               assembly[comparison_coord].dims == tuple(stimulus_dims) and \
+               len(np.unique(assembly[comparison_coord].values)) == len(assembly[comparison_coord])
+
+    def condensed(self, comparison_values):
+        """
+        :return: tuple of the sorted `comparison_values` and the condensed `RDM` of those stimuli,
+            same as :class:`CondensedRDM` on the subset of the assembly
+        """
+        comparison_values = np.sort(comparison_values)
+        positions = np.searchsorted(self._comparison_values, comparison_values)
+        assert (self._comparison_values[positions] == comparison_values).all()
+        correlations = self._correlations[np.ix_(positions, positions)]
+        return comparison_values, 1 - correlations[np.triu_indices(len(positions), k=1)]
+
+
+class PrecomputedRDMSimilarity:
+    """
+    Computes the `RDM` similarity of two assemblies' subsets from their :class:`PrecomputedRDM`s
+    """
+
+    def __init__(self, rdm1, rdm2, comparison_coord=XarrayDefaults.stimulus_coord):
+        self._rdm1 = rdm1
+        self._rdm2 = rdm2
+        self._comparison_coord = comparison_coord
+        self._similarity = CondensedRDMSimilarity()
+
+    def __call__(self, assembly1, assembly2):
+        condensed1 = self._rdm1.condensed(assembly1[self._comparison_coord].values)
+        condensed2 = self._rdm2.condensed(assembly2[self._comparison_coord].values)
+        similarity = self._similarity(condensed1, condensed2)
+        return DataAssembly(similarity)
 
 
 class RDMMetric:
@@ -37,10 +117,22 @@ class RDMMetric:
     Kriegeskorte et al., 2008 https://doi.org/10.3389/neuro.06.004.2008
     """
 
-    def __init__(self, neuroid_dim=XarrayDefaults.neuroid_dim, comparison_coord=XarrayDefaults.stimulus_coord):
+    def __init__(self, neuroid_dim=XarrayDefaults.neuroid_dim, comparison_coord=XarrayDefaults.stimulus_coord,
+                 condensed=False, dtype=None):
+        """
+        :param condensed: compute only the condensed upper triangles of the `RDM`s (see :class:`CondensedRDM`)
+            rather than sorting and indexing full matrices. Requires O(n^2 / 2) instead of several O(n^2) memory.
+        :param dtype: precision of the `RDM`s, e.g. `np.float32` to halve their memory.
+            `XarrayDefaults.dtype` or float64 if not given.
+        """
         self._neuroid_dim = neuroid_dim
-        self._rdm = RDM(neuroid_dim=neuroid_dim)
-        self._similarity = RDMSimilarity(comparison_coord=comparison_coord)
+        self._condensed = condensed
+        if not condensed:
+            self._rdm = RDM(neuroid_dim=neuroid_dim, dtype=dtype)
+            self._similarity = RDMSimilarity(comparison_coord=comparison_coord)
+        else:
+            self._rdm = CondensedRDM(neuroid_dim=neuroid_dim, comparison_coord=comparison_coord, dtype=dtype)
+            self._similarity = CondensedRDMSimilarity()
 
     def __call__(self, assembly1, assembly2):
         """
@@ -63,12 +155,25 @@ class RSA:
     Kriegeskorte et al., 2008 https://doi.org/10.3389/neuro.06.004.2008
     """
 
-    def __init__(self, neuroid_dim=XarrayDefaults.neuroid_dim):
+    def __init__(self, neuroid_dim=XarrayDefaults.neuroid_dim, dtype=None):
+        """
+        :param dtype: precision of the correlations.
+            If neither this nor `XarrayDefaults.dtype` is given, `np.corrcoef`'s float64 is used.
+        """
         self._neuroid_dim = neuroid_dim
+        self._dtype = dtype
 
     def __call__(self, assembly):
         assert len(assembly.dims) == 2
-        correlations = np.corrcoef(assembly) if assembly.dims[-1] == self._neuroid_dim else np.corrcoef(assembly.T).T
+        dtype = resolve_dtype(self._dtype)
+        if dtype is None:
+            correlations = np.corrcoef(assembly) if assembly.dims[-1] == self._neuroid_dim \
+                else np.corrcoef(assembly.T).T
+        else:
+            values = assembly.values if assembly.dims[-1] == self._neuroid_dim else assembly.values.T
+            values = normalize_rows(values, dtype=dtype)
+            correlations = values @ values.T
+            np.fill_diagonal(correlations, 1)  # exact self-correlations despite rounding in lower precisions
         coords = {coord: coord_value for coord, coord_value in assembly.coords.items() if coord != self._neuroid_dim}
         dims = [dim if dim != self._neuroid_dim else assembly.dims[(i - 1) % len(assembly.dims)]
                 for i, dim in enumerate(assembly.dims)]
@@ -121,3 +226,87 @@ class RDMSimilarity(object):
                                           for coord, dims, values in walk_coords(assembly)},
                                   dims=assembly.dims)
         return assembly
+
+
+class CondensedRDM:
+    """
+    Representational Dissimilarity Matrix in condensed form:
+    sorts the stimuli of a `presentation x neuroid` assembly by the comparison coord
+    and computes only the upper triangle (excluding the diagonal) of 1 - the correlation between stimuli,
+    in the order of `np.triu_indices(num_stimuli, k=1)`.
+    The triangle is filled block-wise so that no full `presentation x presentation` matrix is ever allocated.
+
+    Kriegeskorte et al., 2008 https://doi.org/10.3389/neuro.06.004.2008
+    """
+
+    def __init__(self, neuroid_dim=XarrayDefaults.neuroid_dim, comparison_coord=XarrayDefaults.stimulus_coord,
+                 dtype=None, block_size=1024):
+        self._neuroid_dim = neuroid_dim
+        self._comparison_coord = comparison_coord
+        self._dtype = dtype
+        self._block_size = block_size
+
+    def __call__(self, assembly):
+        """
+        :return: tuple of the sorted comparison coord values and the condensed `RDM`
+        """
+        assert len(assembly.dims) == 2
+        stimulus_dim = [dim for dim in assembly.dims if dim != self._neuroid_dim]
+        assert len(stimulus_dim) == 1
+        assert assembly[self._comparison_coord].dims == tuple(stimulus_dim)
+        comparison_values = assembly[self._comparison_coord].values
+        indices = np.argsort(comparison_values)
+        values = assembly.transpose(stimulus_dim[0], self._neuroid_dim).values[indices]
+        dtype = resolve_dtype(self._dtype, default=np.float64)
+        return comparison_values[indices], condensed_rdm(values, dtype=dtype, block_size=self._block_size)
+
+
+def condensed_rdm(values, dtype=np.float64, block_size=1024):
+    """
+    :param values: matrix of `stimulus x neuroid`
+    :return: the upper triangle of 1 - the `stimulus x stimulus` correlation matrix,
+        in the order of `np.triu_indices(len(values), k=1)`
+    """
+    values = normalize_rows(values, dtype=dtype)
+    num_stimuli = len(values)
+    condensed = np.empty(num_stimuli * (num_stimuli - 1) // 2, dtype=dtype)
+    offset = 0
+    for block_start in range(0, num_stimuli, block_size):
+        block = values[block_start:block_start + block_size]
+        correlations = block @ values[block_start:].T
+        for row in range(len(block)):
+            row_correlations = correlations[row, row + 1:]
+            condensed[offset:offset + len(row_correlations)] = 1 - row_correlations
+            offset += len(row_correlations)
+    return condensed
+
+
+def normalize_rows(values, dtype=np.float64):
+    """
+    Centers every row and scales it to unit norm, such that the dot products between rows are their correlations.
+    Means and norms are accumulated in float64, the result is of `dtype`.
+    """
+    values = np.asarray(values, dtype=dtype)
+    values = values - values.mean(axis=1, keepdims=True, dtype=np.float64).astype(dtype)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = values / np.sqrt(np.einsum('ij,ij->i', values, values, dtype=np.float64)).astype(dtype)[:, np.newaxis]
+    return values
+
+
+class CondensedRDMSimilarity:
+    """
+    Spearman correlation between two condensed `RDM`s of the same stimuli, see :class:`CondensedRDM`
+    """
+
+    def __call__(self, condensed_rdm1, condensed_rdm2):
+        (comparison_values1, triu1), (comparison_values2, triu2) = condensed_rdm1, condensed_rdm2
+        assert (comparison_values1 == comparison_values2).all()
+        return ranked_correlation(rankdata(triu1), rankdata(triu2))
+
+
+def ranked_correlation(ranks1, ranks2):
+    """
+    Pearson correlation between ranks, i.e. the Spearman correlation of the ranked values
+    """
+    ranks1, ranks2 = ranks1 - ranks1.mean(), ranks2 - ranks2.mean()
+    return np.dot(ranks1, ranks2) / np.sqrt(np.dot(ranks1, ranks1) * np.dot(ranks2, ranks2))
@@ -1,12 +1,16 @@
+import numpy as np
 import scipy.stats
 from sklearn.cross_decomposition import PLSRegression
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import scale
 
 from brainio_base.assemblies import walk_coords
+from brainscore.metrics.dimensionality_reduction import TrainPCA
 from brainscore.metrics.mask_regression import MaskRegression
+from brainscore.metrics.pls import KernelPLSRegression
+from brainscore.metrics.ridge import GramRidgeRegression, GCVRidgeRegression, XarrayGramRegression
 from brainscore.metrics.transformations import CrossValidation
-from .xarray_utils import XarrayRegression, XarrayCorrelation
+from .xarray_utils import XarrayRegression, XarrayCorrelation, resolve_dtype
 
 
 class CrossRegressedCorrelation:
@@ -20,6 +24,8 @@ class CrossRegressedCorrelation:
         self.correlation = correlation
 
     def __call__(self, source, target):
+        if hasattr(self.regression, 'prepare'):  # share computations on the full source across splits
+            self.regression.prepare(source)
         return self.cross_validation(source, target, apply=self.apply, aggregate=self.aggregate)
 
     def apply(self, source_train, target_train, source_test, target_test):
@@ -33,32 +39,78 @@ class CrossRegressedCorrelation:
 
 
 class ScaledCrossRegressedCorrelation:
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, dtype=None, **kwargs):
+        """
+        :param dtype: precision of the scaled target, `XarrayDefaults.dtype` or the target's own if not given
+        """
         self.cross_regressed_correlation = CrossRegressedCorrelation(*args, **kwargs)
         self.aggregate = self.cross_regressed_correlation.aggregate
+        self._dtype = dtype
 
     def __call__(self, source, target):
-        scaled_values = scale(target, copy=True)
+        dtype = resolve_dtype(self._dtype)
+        scaled_values = scale(target, copy=True) if dtype is None else standardize(target.values, dtype=dtype)
         target = target.__class__(scaled_values, coords={
             coord: (dims, value) for coord, dims, value in walk_coords(target)}, dims=target.dims)
         return self.cross_regressed_correlation(source, target)
 
 
+def standardize(values, dtype):
+    """
+    Scales every column to zero mean and unit variance like `sklearn.preprocessing.scale`,
+    accumulating mean and variance in float64 but returning `dtype`.
+    """
+    values = np.asarray(values, dtype=dtype)
+    mean = values.mean(axis=0, dtype=np.float64)
+    std = values.std(axis=0, dtype=np.float64)
+    std[std == 0] = 1
+    return (values - mean.astype(dtype)) / std.astype(dtype)
+
+
 def mask_regression():
     regression = MaskRegression()
     regression = XarrayRegression(regression)
     return regression
 
 
-def pls_regression(regression_kwargs=None, xarray_kwargs=None):
-    regression_defaults = dict(n_components=25, scale=False)
+def pls_regression(regression_kwargs=None, xarray_kwargs=None, engine='sklearn', pca_components=None):
+    """
+    :param engine: `'sklearn'` for sklearn's iterative `PLSRegression`,
+        `'kernel'` for the closed-form :class:`~brainscore.metrics.pls.KernelPLSRegression`
+        (float32 by default, pass `regression_kwargs=dict(dtype=np.float64)` for double precision)
+    :param pca_components: if set, reduce the source to this many principal components of the training split
+        before fitting (see :class:`~brainscore.metrics.dimensionality_reduction.TrainPCA`)
+    """
+    engines = {'sklearn': (PLSRegression, dict(n_components=25, scale=False)),
+               'kernel': (KernelPLSRegression, dict(n_components=25))}
+    if engine not in engines:
+        raise ValueError(f"Unknown PLS engine '{engine}' - must choose from {list(engines.keys())}")
+    regression_ctr, regression_defaults = engines[engine]
     regression_kwargs = {**regression_defaults, **(regression_kwargs or {})}
-    regression = PLSRegression(**regression_kwargs)
+    regression = regression_ctr(**regression_kwargs)
+    if pca_components is not None:
+        regression = TrainPCA(regression, n_components=pca_components)
     xarray_kwargs = xarray_kwargs or {}
     regression = XarrayRegression(regression, **xarray_kwargs)
     return regression
 
 
+def ridge_regression(regression_kwargs=None, xarray_kwargs=None):
+    regression_kwargs = regression_kwargs or {}
+    regression = GCVRidgeRegression(**regression_kwargs)
+    xarray_kwargs = xarray_kwargs or {}
+    regression = XarrayRegression(regression, **xarray_kwargs)
+    return regression
+
+
+def gram_ridge_regression(regression_kwargs=None, xarray_kwargs=None):
+    regression_kwargs = regression_kwargs or {}
+    regression = GramRidgeRegression(**regression_kwargs)
+    xarray_kwargs = xarray_kwargs or {}
+    regression = XarrayGramRegression(regression, **xarray_kwargs)
+    return regression
+
+
 def linear_regression(xarray_kwargs=None):
     regression = LinearRegression()
     xarray_kwargs = xarray_kwargs or {}
@@ -0,0 +1,158 @@
+import numpy as np
+import scipy.linalg
+
+from brainscore.metrics.xarray_utils import XarrayRegression, resolve_dtype
+
+
+class GramRidgeRegression:
+    """
+    Ridge regression (with an unpenalized intercept) solved in its dual form on the stimulus x stimulus Gram matrix.
+    After :meth:`prepare` has computed the Gram matrix of all source stimuli once,
+    every fit only solves a system of the size of its training stimuli, indexed from the shared Gram matrix,
+    and predictions are read from the Gram matrix as well -
+    so that cross-validating over overlapping splits costs one `features`-sized product in total.
+    Stimuli are identified by their ids: :meth:`fit` and :meth:`predict` take the ids of the rows of `X`,
+    and only use the Gram matrix if `X` equals the prepared features of those stimuli.
+    Computations run in `dtype`, `XarrayDefaults.dtype` or float64 if not given.
+    """
+
+    def __init__(self, alpha=1., dtype=None):
+        assert alpha > 0, "the dual solution requires a positive regularization"
+        self.alpha = alpha
+        self.dtype = dtype
+        self._features, self._ids, self._id_order, self._gram = None, None, None, None
+
+    def prepare(self, X, ids):
+        X = np.asarray(X, dtype=resolve_dtype(self.dtype, default=np.float64))
+        ids = np.asarray(ids)
+        self._features = X
+        self._id_order = np.argsort(ids, kind='stable')
+        self._ids = ids[self._id_order]
+        assert len(np.unique(self._ids)) == len(self._ids), "stimulus ids must be unique"
+        self._gram = X @ X.T
+
+    def _rows(self, X, ids):
+        """
+        :return: the rows of the prepared features for `ids`, or None if not prepared for these stimuli and features
+        """
+        if self._ids is None:
+            return None
+        positions = np.clip(np.searchsorted(self._ids, ids), 0, len(self._ids) - 1)
+        if not np.array_equal(self._ids[positions], ids):
+            return None
+        rows = self._id_order[positions]
+        # a different source (e.g. another layer) with the same stimuli; linear in X, unlike the Gram matrix
+        if not np.array_equal(np.asarray(X, dtype=self._features.dtype), self._features[rows]):
+            return None
+        return rows
+
+    def fit(self, X, Y, ids):
+        rows = self._rows(X, ids)
+        if rows is None:  # not prepared for these stimuli
+            self.prepare(X, ids)
+            rows = self._rows(X, ids)
+        Y = np.asarray(Y, dtype=self._gram.dtype)
+        gram = self._gram[np.ix_(rows, rows)]
+        # center the kernel as if the features had been centered on the training stimuli
+        self._train_rows = rows
+        self._train_gram_means = gram.mean(axis=0)
+        self._train_gram_mean = self._train_gram_means.mean()
+        centered_gram = gram - self._train_gram_means[:, np.newaxis] - self._train_gram_means[np.newaxis, :] \
+                        + self._train_gram_mean
+        self._y_mean = Y.mean(axis=0)
+        centered_gram[np.diag_indices_from(centered_gram)] += self.alpha
+        self._dual_coef = scipy.linalg.solve(centered_gram, Y - self._y_mean, assume_a='pos')
+        return self
+
+    def predict(self, X, ids):
+        rows = self._rows(X, ids)
+        if rows is None:  # unknown stimuli, fall back to the features
+            gram = np.asarray(X, dtype=self._gram.dtype) @ self._features[self._train_rows].T
+        else:
+            gram = self._gram[np.ix_(rows, self._train_rows)]
+        centered_gram = gram - gram.mean(axis=1, keepdims=True) - self._train_gram_means[np.newaxis, :] \
+                        + self._train_gram_mean
+        return centered_gram @ self._dual_coef + self._y_mean
+
+
+class GCVRidgeRegression:
+    """
+    Ridge regression (with an unpenalized intercept) that selects the regularization strength per target
+    by efficient leave-one-out cross-validation, equivalent to
+    `sklearn.linear_model.RidgeCV(alphas, alpha_per_target=True)`.
+    A single eigendecomposition of the smaller of the centered source's two Gram matrices
+    yields the leave-one-out errors of every alpha in closed form, so the whole alpha grid costs one decomposition.
+    Computations run in `dtype`, `XarrayDefaults.dtype` or float64 if not given.
+    """
+
+    def __init__(self, alphas=np.logspace(-3, 6, 10), dtype=None):
+        self.alphas = np.asarray(alphas, dtype=np.float64)
+        assert (self.alphas > 0).all()
+        self.dtype = dtype
+
+    def fit(self, X, Y):
+        dtype = resolve_dtype(self.dtype, default=np.float64)
+        X, Y = np.asarray(X, dtype=dtype), np.asarray(Y, dtype=dtype)
+        squeeze = Y.ndim == 1
+        if squeeze:
+            Y = Y[:, np.newaxis]
+        num_samples, num_features = X.shape
+        x_mean, y_mean = X.mean(axis=0), Y.mean(axis=0)
+        X, Y = X - x_mean, Y - y_mean
+        # thin SVD X = U diag(s) V^T from the eigendecomposition of the smaller Gram matrix
+        if num_features < num_samples:
+            eigenvalues, V = np.linalg.eigh(X.T @ X)
+            keep = eigenvalues > eigenvalues.max() * np.finfo(dtype).eps * max(X.shape)
+            eigenvalues, V = eigenvalues[keep], V[:, keep]
+            U = (X @ V) / np.sqrt(eigenvalues)
+        else:
+            eigenvalues, U = np.linalg.eigh(X @ X.T)
+            keep = eigenvalues > eigenvalues.max() * np.finfo(dtype).eps * max(X.shape)
+            eigenvalues, U = eigenvalues[keep], U[:, keep]
+            V = None
+        UtY = U.T @ Y
+        # leave-one-out residuals of the hat matrix 1/n + U diag(s^2 / (s^2 + alpha)) U^T
+        mean_squared_errors = np.empty((len(self.alphas), Y.shape[1]))
+        for i, alpha in enumerate(self.alphas):
+            shrinkage = eigenvalues / (eigenvalues + alpha)
+            residuals = Y - U @ (shrinkage[:, np.newaxis] * UtY)
+            hat_diagonal = 1 / num_samples + (U ** 2) @ shrinkage
+            mean_squared_errors[i] = ((residuals / (1 - hat_diagonal)[:, np.newaxis]) ** 2).mean(axis=0)
+        self.alpha_ = self.alphas[mean_squared_errors.argmin(axis=0)]
+        # coef = V diag(s / (s^2 + alpha)) U^T Y = X^T U diag(1 / (s^2 + alpha)) U^T Y, per target
+        dual_coef = UtY / (eigenvalues[:, np.newaxis] + self.alpha_[np.newaxis, :])
+        if V is not None:
+            self.coef_ = V @ (np.sqrt(eigenvalues)[:, np.newaxis] * dual_coef)
+        else:
+            self.coef_ = X.T @ (U @ dual_coef)
+        self.coef_ = self.coef_.astype(dtype)
+        self.intercept_ = (y_mean - x_mean @ self.coef_).astype(dtype)
+        self._squeeze = squeeze
+        return self
+
+    def predict(self, X):
+        prediction = np.asarray(X, dtype=self.coef_.dtype) @ self.coef_ + self.intercept_
+        return prediction[:, 0] if self._squeeze else prediction
+
+
+class XarrayGramRegression(XarrayRegression):
+    """
+    Passes the stimulus ids of the assemblies to a :class:`GramRidgeRegression`
+    and lets it precompute the Gram matrix of all source stimuli with :meth:`prepare`.
+    """
+
+    def prepare(self, source):
+        source = self._align(source)
+        self._regression.prepare(source.values, source[self._stimulus_coord].values)
+
+    def fit(self, source, target):
+        source, target = self._align(source), self._align(target)
+        source, target = source.sortby(self._stimulus_coord), target.sortby(self._stimulus_coord)
+        self._regression.fit(source.values, target.values, source[self._stimulus_coord].values)
+        self._remember_target_neuroids(target)
+
+    def predict(self, source):
+        source = self._align(source)
+        predicted_values = self._regression.predict(source.values, source[self._stimulus_coord].values)
+        prediction = self._package_prediction(predicted_values, source=source)
+        return prediction
@@ -0,0 +1,180 @@
+"""
+Metrics that consume model outputs batch by batch (see `BrainModel.look_at_batches`)
+by accumulating sufficient statistics instead of materializing the full `presentation x neuroid` matrix.
+"""
+
+import numpy as np
+import scipy.linalg
+
+from brainio_base.assemblies import walk_coords
+from brainscore.metrics import Score
+from brainscore.metrics.xarray_utils import XarrayRegression, Defaults as XarrayDefaults
+
+
+class StreamingPearson:
+    """
+    Accumulates the sufficient statistics of column-wise Pearson correlations between `x` and `y`
+    (counts, sums, sums of squares and cross-products, in float64) over batches of samples.
+    """
+
+    def __init__(self):
+        self._count = 0
+        self._sums = None
+
+    def update(self, x, y):
+        x, y = np.asarray(x), np.asarray(y)
+        assert x.shape == y.shape and x.ndim == 2
+        if self._sums is None:
+            self._sums = {key: np.zeros(x.shape[1]) for key in ['x', 'y', 'xx', 'yy', 'xy']}
+        self._count += len(x)
+        self._sums['x'] += x.sum(axis=0, dtype=np.float64)
+        self._sums['y'] += y.sum(axis=0, dtype=np.float64)
+        self._sums['xx'] += np.einsum('ij,ij->j', x, x, dtype=np.float64)
+        self._sums['yy'] += np.einsum('ij,ij->j', y, y, dtype=np.float64)
+        self._sums['xy'] += np.einsum('ij,ij->j', x, y, dtype=np.float64)
+
+    def result(self):
+        """
+        :return: the correlation coefficient per column
+        """
+        n, sums = self._count, self._sums
+        covariance = sums['xy'] - sums['x'] * sums['y'] / n
+        x_variance = sums['xx'] - sums['x'] ** 2 / n
+        y_variance = sums['yy'] - sums['y'] ** 2 / n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.clip(covariance / np.sqrt(x_variance * y_variance), -1, 1)
+
+
+class StreamingCorrelation:
+    """
+    Pearson correlation per neuroid between prediction batches and the matching stimuli of a target assembly.
+    Only the target (e.g. neural recordings) is held in memory in full.
+    """
+
+    def __init__(self, correlation_coord=XarrayDefaults.stimulus_coord, neuroid_coord=XarrayDefaults.neuroid_coord,
+                 neuroid_dim=XarrayDefaults.neuroid_dim):
+        self._correlation_coord = correlation_coord
+        self._neuroid_coord = neuroid_coord
+        self._neuroid_dim = neuroid_dim
+        self._pearson = StreamingPearson()
+        self._neuroid_coords = None
+        self._target = None, None, None  # target, sorted target, stimulus order
+
+    def update(self, prediction, target):
+        prediction = prediction.sortby(self._neuroid_coord)
+        sorted_target, stimulus_order = self._sorted_target(target)
+        assert (prediction[self._neuroid_coord].values == sorted_target[self._neuroid_coord].values).all()
+        stimulus_dim = [dim for dim in prediction.dims if dim != self._neuroid_dim]
+        assert len(stimulus_dim) == 1
+        stimulus_dim = stimulus_dim[0]
+        target = sorted_target.isel(**{stimulus_dim: _positions(sorted_target[self._correlation_coord].values,
+                                                                prediction[self._correlation_coord].values,
+                                                                order=stimulus_order)})
+        self._pearson.update(prediction.transpose(stimulus_dim, self._neuroid_dim).values,
+                             target.transpose(stimulus_dim, self._neuroid_dim).values)
+        if self._neuroid_coords is None:
+            self._neuroid_coords = {coord: (dims, values) for coord, dims, values in walk_coords(target)
+                                    if dims == (self._neuroid_dim,)}
+
+    def _sorted_target(self, target):
+        # the full target is only sorted once, every batch then just looks up its stimuli
+        cached_target, sorted_target, stimulus_order = self._target
+        if cached_target is not target:
+            sorted_target = target.sortby(self._neuroid_coord)
+            stimulus_order = np.argsort(sorted_target[self._correlation_coord].values, kind='stable')
+            self._target = target, sorted_target, stimulus_order
+        return sorted_target, stimulus_order
+
+    def result(self):
+        return Score(self._pearson.result(), coords=self._neuroid_coords, dims=[self._neuroid_dim])
+
+
+def _positions(values, query_values, order=None):
+    """
+    :param order: the `argsort` of `values` if already known
+    :return: the index of every element of `query_values` in the unique `values`
+    """
+    if order is None:
+        order = np.argsort(values, kind='stable')
+    positions = order[np.clip(np.searchsorted(values, query_values, sorter=order), 0, len(values) - 1)]
+    assert (values[positions] == query_values).all(), "batch contains values that are not part of the target"
+    return positions
+
+
+class StreamingRidgeRegression:
+    """
+    Linear regression with an unpenalized intercept and an optional ridge penalty `alpha`,
+    fit from batches via the normal equations: only the `features x features` and `features x targets`
+    cross-products are kept, in float64.
+    Memory therefore grows quadratically with the number of features, regardless of the number of samples;
+    reduce very wide sources first (see :mod:`brainscore.metrics.dimensionality_reduction`).
+    """
+
+    def __init__(self, alpha=0.):
+        self.alpha = alpha
+        self._count = 0
+        self._statistics = None
+        self._coef, self._intercept = None, None
+
+    def partial_fit(self, X, Y):
+        X, Y = np.asarray(X), np.asarray(Y)
+        if self._statistics is None:
+            self._statistics = {'x': np.zeros(X.shape[1]), 'y': np.zeros(Y.shape[1]),
+                                'xx': np.zeros((X.shape[1], X.shape[1])), 'xy': np.zeros((X.shape[1], Y.shape[1]))}
+        self._count += len(X)
+        self._statistics['x'] += X.sum(axis=0, dtype=np.float64)
+        self._statistics['y'] += Y.sum(axis=0, dtype=np.float64)
+        self._statistics['xx'] += np.asarray(X.T @ X, dtype=np.float64)
+        self._statistics['xy'] += np.asarray(X.T @ Y, dtype=np.float64)
+        self._coef = None  # solve again on next prediction
+        return self
+
+    def fit(self, X, Y):
+        self._count, self._statistics = 0, None
+        return self.partial_fit(X, Y)
+
+    def _solve(self):
+        n, statistics = self._count, self._statistics
+        x_mean, y_mean = statistics['x'] / n, statistics['y'] / n
+        centered_xx = statistics['xx'] - n * np.outer(x_mean, x_mean)
+        centered_xy = statistics['xy'] - n * np.outer(x_mean, y_mean)
+        centered_xx[np.diag_indices_from(centered_xx)] += self.alpha
+        self._coef = scipy.linalg.lstsq(centered_xx, centered_xy)[0] if self.alpha == 0 else \
+            scipy.linalg.solve(centered_xx, centered_xy, assume_a='pos')
+        self._intercept = y_mean - x_mean @ self._coef
+
+    def predict(self, X):
+        if self._coef is None:
+            self._solve()
+        X = np.asarray(X)
+        return (X @ self._coef.astype(X.dtype, copy=False) + self._intercept).astype(X.dtype, copy=False)
+
+
+class XarrayStreamingRegression(XarrayRegression):
+    """
+    Fits a regression supporting `partial_fit` (e.g. :class:`StreamingRidgeRegression`) on source batches,
+    regressing onto the matching stimuli of the full target assembly.
+    Predictions for a batch are made with the inherited `predict`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(XarrayStreamingRegression, self).__init__(*args, **kwargs)
+        self._target = None, None, None  # target, aligned target, stimulus order
+
+    def partial_fit(self, source, target):
+        source = self._align(source)
+        aligned_target, stimulus_order = self._aligned_target(target)
+        target = aligned_target.isel(**{self._expected_dims[0]: _positions(
+            aligned_target[self._stimulus_coord].values, source[self._stimulus_coord].values, order=stimulus_order)})
+        self._regression.partial_fit(source.values, target.values)
+        if self._target_neuroid_values is None:
+            self._remember_target_neuroids(target)
+
+    def _aligned_target(self, target):
+        # the full target is only aligned once, every batch then just looks up its stimuli
+        cached_target, aligned_target, stimulus_order = self._target
+        if cached_target is not target:
+            aligned_target = self._align(target)
+            stimulus_order = np.argsort(aligned_target[self._stimulus_coord].values, kind='stable')
+            self._target = target, aligned_target, stimulus_order
+        return aligned_target, stimulus_order
@@ -1,3 +1,4 @@
+import functools
 import logging
 from collections import OrderedDict
 
@@ -12,7 +13,7 @@ from brainio_base.assemblies import DataAssembly, walk_coords
 from brainio_collection.transform import subset
 from brainscore.metrics import Score
 from brainscore.metrics.utils import unique_ordered
-from brainscore.utils import fullname
+from brainscore.utils import fullname, map_parallel
 
 
 def apply_aggregate(aggregate_fnc, values):
@@ -191,6 +192,15 @@ class Split:
             splits = self._shuffle_split.split(data_shape)
         return cross_validation_values, list(splits)
 
+    def subsetter(self, assembly, cross_validation_values, by_index=False):
+        """
+        :return: a callable mapping split indices into `cross_validation_values` to the matching part of `assembly`
+        """
+        coord_dims = assembly[self._split_coord].dims
+        if by_index and len(coord_dims) == 1 and assembly.dims.count(coord_dims[0]) == 1:  # no e.g. RDM dims
+            return IndexSubset(assembly, self._split_coord, cross_validation_values.values)
+        return ValuesSubset(assembly, cross_validation_values)
+
     @classmethod
     def aggregate(cls, values):
         center = values.mean('split')
@@ -201,6 +211,44 @@ class Split:
                      dims=('aggregation',) + center.dims)
 
 
+class ValuesSubset:
+    """
+    Selects the part of an assembly matching the split values by coordinate matching.
+    """
+
+    def __init__(self, assembly, cross_validation_values):
+        self._assembly = assembly
+        self._cross_validation_values = cross_validation_values
+
+    def __call__(self, indices):
+        return subset(self._assembly, self._cross_validation_values[indices], dims_must_match=False)
+
+
+class IndexSubset:
+    """
+    Selects the same part of an assembly as :class:`ValuesSubset`,
+    but resolves the mapping from split values to rows once and then slices every split positionally.
+    """
+
+    def __init__(self, assembly, coord, cross_validation_values):
+        dims = assembly[coord].dims
+        assert len(dims) == 1
+        self._assembly = assembly
+        self._dim = dims[0]
+        unique_values, self._value_codes = np.unique(cross_validation_values, return_inverse=True)
+        self._num_values = len(unique_values)
+        assembly_values = assembly[coord].values
+        row_codes = np.searchsorted(unique_values, assembly_values).clip(max=self._num_values - 1)
+        # rows whose value is not part of the cross-validation values point to an always-unselected sentinel
+        self._row_codes = np.where(unique_values[row_codes] == assembly_values, row_codes, self._num_values)
+
+    def __call__(self, indices):
+        selected = np.zeros(self._num_values + 1, dtype=bool)
+        selected[self._value_codes[indices]] = True
+        rows = np.where(selected[self._row_codes])[0]  # keep the assembly's order, same as `subset`
+        return self._assembly.isel(**{self._dim: rows})
+
+
 def extract_coord(assembly, coord, unique=False):
     if not unique:
         coord_values = assembly[coord].values
@@ -220,51 +268,81 @@ class TestOnlyCrossValidationSingle:
         self._cross_validation = CrossValidationSingle(*args, **kwargs)
 
     def __call__(self, *args, apply, **kwargs):
-        apply_wrapper = lambda train, test: apply(test)
+        apply_wrapper = functools.partial(_apply_test_single, apply)  # partial instead of lambda to be picklable
         return self._cross_validation(*args, apply=apply_wrapper, **kwargs)
 
 
+def _apply_test_single(apply, train, test):
+    return apply(test)
+
+
 class TestOnlyCrossValidation:
     def __init__(self, *args, **kwargs):
         self._cross_validation = CrossValidation(*args, **kwargs)
 
     def __call__(self, *args, apply, **kwargs):
-        apply_wrapper = lambda train1, train2, test1, test2: apply(test1, test2)
+        apply_wrapper = functools.partial(_apply_test, apply)  # partial instead of lambda to be picklable
         return self._cross_validation(*args, apply=apply_wrapper, **kwargs)
 
 
+def _apply_test(apply, train1, train2, test1, test2):
+    return apply(test1, test2)
+
+
 class CrossValidationSingle(Transformation):
     def __init__(self,
                  splits=Split.Defaults.splits, train_size=None, test_size=None,
                  split_coord=Split.Defaults.split_coord, stratification_coord=Split.Defaults.stratification_coord,
-                 unique_split_values=Split.Defaults.unique_split_values, random_state=Split.Defaults.random_state):
+                 unique_split_values=Split.Defaults.unique_split_values, random_state=Split.Defaults.random_state,
+                 subset_by_index=False, executor=None, max_workers=None):
+        """
+        :param subset_by_index: resolve the rows of every split value once and slice splits positionally
+            (see :class:`IndexSubset`) instead of matching coordinates for every split. The outputs are identical.
+        :param executor: if `'thread'` or `'process'`, all splits are prepared up front
+            and `apply` is evaluated on them in parallel (see :meth:`brainscore.utils.map_parallel`).
+            Split results are merged in split order, i.e. the score is identical to the serial default.
+        :param max_workers: number of parallel workers when using an `executor`
+        """
         super().__init__()
         self._split = Split(splits=splits, split_coord=split_coord,
                             stratification_coord=stratification_coord, unique_split_values=unique_split_values,
                             train_size=train_size, test_size=test_size, random_state=random_state)
+        self._subset_by_index = subset_by_index
+        self._executor = executor
+        self._max_workers = max_workers
         self._logger = logging.getLogger(fullname(self))
 
+    def _run_pipe(self, assembly, apply):
+        if self._executor is None:
+            return super(CrossValidationSingle, self)._run_pipe(assembly, apply=apply)
+        cross_validation_values, splits = self._split.build_splits(assembly)
+        subsetter = self._split.subsetter(assembly, cross_validation_values, by_index=self._subset_by_index)
+        split_assemblies = [self._split_assemblies(subsetter, train_indices, test_indices)
+                            for train_indices, test_indices in splits]
+        split_scores = map_parallel(apply, split_assemblies, executor=self._executor, max_workers=self._max_workers,
+                                    desc='cross-validation')
+        return merge_split_scores(split_scores)
+
     def pipe(self, assembly):
         """
         :param assembly: the assembly to cross-validate over
         """
         cross_validation_values, splits = self._split.build_splits(assembly)
+        subsetter = self._split.subsetter(assembly, cross_validation_values, by_index=self._subset_by_index)
 
         split_scores = []
         for split_iterator, (train_indices, test_indices), done \
                 in tqdm(enumerate_done(splits), total=len(splits), desc='cross-validation'):
-            train_values, test_values = cross_validation_values[train_indices], cross_validation_values[test_indices]
-            train = subset(assembly, train_values, dims_must_match=False)
-            test = subset(assembly, test_values, dims_must_match=False)
-
+            train, test = self._split_assemblies(subsetter, train_indices, test_indices)
             split_score = yield from self._get_result(train, test, done=done)
-            split_score = split_score.expand_dims('split')
-            split_score['split'] = [split_iterator]
             split_scores.append(split_score)
 
-        split_scores = Score.merge(*split_scores)
+        split_scores = merge_split_scores(split_scores)
         yield split_scores
 
+    def _split_assemblies(self, subsetter, train_indices, test_indices):
+        return subsetter(train_indices), subsetter(test_indices)
+
     def aggregate(self, score):
         return self._split.aggregate(score)
 
@@ -278,47 +356,89 @@ class CrossValidation(Transformation):
     def __init__(self,
                  splits=Split.Defaults.splits, split_coord=Split.Defaults.split_coord,
                  stratification_coord=Split.Defaults.stratification_coord,
-                 train_size=None, test_size=None, seed=Split.Defaults.random_state):
+                 train_size=None, test_size=None, seed=Split.Defaults.random_state,
+                 subset_by_index=False, executor=None, max_workers=None):
+        """
+        :param subset_by_index: resolve the rows of every split value once and slice splits positionally
+            (see :class:`IndexSubset`) instead of matching coordinates for every split. The outputs are identical.
+        :param executor: if `'thread'` or `'process'`, all splits are prepared up front
+            and `apply` is evaluated on them in parallel (see :meth:`brainscore.utils.map_parallel`).
+            Split results are merged in split order, i.e. the score is identical to the serial default.
+        :param max_workers: number of parallel workers when using an `executor`
+        """
         self._split_coord = split_coord
         self._stratification_coord = stratification_coord
         self._split = Split(splits=splits, split_coord=split_coord,
                             stratification_coord=stratification_coord,
                             train_size=train_size, test_size=test_size, random_state=seed)
+        self._subset_by_index = subset_by_index
+        self._executor = executor
+        self._max_workers = max_workers
         self._logger = logging.getLogger(fullname(self))
 
+    def _run_pipe(self, source_assembly, target_assembly, apply):
+        if self._executor is None:
+            return super(CrossValidation, self)._run_pipe(source_assembly, target_assembly, apply=apply)
+        cross_validation_values, splits = self._build_splits(source_assembly, target_assembly)
+        subsetters = self._subsetters(source_assembly, target_assembly, cross_validation_values)
+        split_assemblies = [self._split_assemblies(*subsetters, train_indices, test_indices)
+                            for train_indices, test_indices in splits]
+        split_scores = map_parallel(apply, split_assemblies, executor=self._executor, max_workers=self._max_workers,
+                                    desc='cross-validation')
+        return merge_split_scores(split_scores)
+
     def pipe(self, source_assembly, target_assembly):
-        # check only for equal values, alignment is given by metadata
-        assert sorted(source_assembly[self._split_coord].values) == sorted(target_assembly[self._split_coord].values)
-        if self._split.do_stratify:
-            assert hasattr(source_assembly, self._stratification_coord)
-            assert sorted(source_assembly[self._stratification_coord].values) == \
-                   sorted(target_assembly[self._stratification_coord].values)
-        cross_validation_values, splits = self._split.build_splits(target_assembly)
+        cross_validation_values, splits = self._build_splits(source_assembly, target_assembly)
+        subsetters = self._subsetters(source_assembly, target_assembly, cross_validation_values)
 
         split_scores = []
         for split_iterator, (train_indices, test_indices), done \
                 in tqdm(enumerate_done(splits), total=len(splits), desc='cross-validation'):
-            train_values, test_values = cross_validation_values[train_indices], cross_validation_values[test_indices]
-            train_source = subset(source_assembly, train_values, dims_must_match=False)
-            train_target = subset(target_assembly, train_values, dims_must_match=False)
-            assert len(train_source[self._split_coord]) == len(train_target[self._split_coord])
-            test_source = subset(source_assembly, test_values, dims_must_match=False)
-            test_target = subset(target_assembly, test_values, dims_must_match=False)
-            assert len(test_source[self._split_coord]) == len(test_target[self._split_coord])
-
+            train_source, train_target, test_source, test_target = self._split_assemblies(
+                *subsetters, train_indices, test_indices)
             split_score = yield from self._get_result(train_source, train_target, test_source, test_target,
                                                       done=done)
-            split_score = split_score.expand_dims('split')
-            split_score['split'] = [split_iterator]
             split_scores.append(split_score)
 
-        split_scores = Score.merge(*split_scores)
+        split_scores = merge_split_scores(split_scores)
         yield split_scores
 
+    def _build_splits(self, source_assembly, target_assembly):
+        # check only for equal values, alignment is given by metadata
+        assert sorted(source_assembly[self._split_coord].values) == sorted(target_assembly[self._split_coord].values)
+        if self._split.do_stratify:
+            assert hasattr(source_assembly, self._stratification_coord)
+            assert sorted(source_assembly[self._stratification_coord].values) == \
+                   sorted(target_assembly[self._stratification_coord].values)
+        return self._split.build_splits(target_assembly)
+
+    def _subsetters(self, source_assembly, target_assembly, cross_validation_values):
+        return tuple(self._split.subsetter(assembly, cross_validation_values, by_index=self._subset_by_index)
+                     for assembly in [source_assembly, target_assembly])
+
+    def _split_assemblies(self, source_subsetter, target_subsetter, train_indices, test_indices):
+        train_source, train_target = source_subsetter(train_indices), target_subsetter(train_indices)
+        assert len(train_source[self._split_coord]) == len(train_target[self._split_coord])
+        test_source, test_target = source_subsetter(test_indices), target_subsetter(test_indices)
+        assert len(test_source[self._split_coord]) == len(test_target[self._split_coord])
+        return train_source, train_target, test_source, test_target
+
     def aggregate(self, score):
         return self._split.aggregate(score)
 
 
+def merge_split_scores(split_scores):
+    """
+    Merges per-split scores into a single score with a `split` dimension, in the order they are passed.
+    """
+    split_scores = list(split_scores)
+    for split_iterator, split_score in enumerate(split_scores):
+        split_score = split_score.expand_dims('split')
+        split_score['split'] = [split_iterator]
+        split_scores[split_iterator] = split_score
+    return Score.merge(*split_scores)
+
+
 def standard_error_of_the_mean(values, dim):
     return values.std(dim) / math.sqrt(len(values[dim]))
 
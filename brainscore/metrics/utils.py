@@ -2,7 +2,7 @@ from collections import OrderedDict
 
 import numpy as np
 
-from brainio_base.assemblies import walk_coords
+from brainio_base.assemblies import walk_coords, array_is_element
 
 
 def collect_coords(assembly, ignore_dims, rename_coords_list, kind):
@@ -69,3 +69,57 @@ def merge_dicts(dicts):
 def unique_ordered(a):
     _, idx = np.unique(a, return_index=True)
     return a[np.sort(idx)]
+
+
+def factorize(*value_arrays):
+    """
+    Assigns integer codes to the rows of aligned value arrays,
+    such that rows sharing the same values in all arrays share the same code.
+    Codes are ordered like the sorted tuples of values, i.e. the same order as a `multi_groupby` over the arrays.
+    :return: the code per row, and the index of the first row of every code
+    """
+    codes = np.zeros(len(value_arrays[0]), dtype=np.int64)
+    for values in value_arrays:
+        _, value_codes = np.unique(values, return_inverse=True)
+        codes = codes * (value_codes.max() + 1) + value_codes.reshape(-1)
+        _, codes = np.unique(codes, return_inverse=True)  # compress to keep the combined codes from overflowing
+        codes = codes.reshape(-1)
+    _, first_indices = np.unique(codes, return_index=True)
+    return codes, first_indices
+
+
+def group_mean(assembly, dim, group_coords, skipna=True, chunk_size=int(1e7)):
+    """
+    Averages all elements along `dim` that share the same values in `group_coords`,
+    equivalent to `assembly.multi_groupby(group_coords).mean(dim=dim, skipna=skipna)`.
+    Instead of grouping with xarray, the group coords are factorized to integer codes once
+    and values are reduced with a segmented sum over the code-sorted rows.
+    Coords along `dim` that are not part of `group_coords` are dropped.
+    :param chunk_size: maximum number of values that are reduced at once, to bound memory
+    """
+    codes, first_indices = factorize(*[assembly[coord].values for coord in group_coords])
+    order = np.argsort(codes, kind='stable')
+    segment_starts = np.concatenate([[0], np.flatnonzero(np.diff(codes[order])) + 1])
+    axis = assembly.dims.index(dim)
+    values = np.moveaxis(assembly.values, axis, 0)
+    group_shape = (len(first_indices),) + values.shape[1:]
+    values = values.reshape(len(codes), -1)
+    means = np.empty((len(first_indices), values.shape[1]),
+                     dtype=values.dtype if np.issubdtype(values.dtype, np.floating) else np.float64)
+    columns_per_chunk = max(1, chunk_size // max(1, len(codes)))
+    for column_start in range(0, values.shape[1], columns_per_chunk):
+        columns = slice(column_start, column_start + columns_per_chunk)
+        chunk = values[order, columns].astype(np.float64)
+        nans = np.isnan(chunk) if skipna else np.zeros(chunk.shape, dtype=bool)
+        chunk[nans] = 0
+        sums = np.add.reduceat(chunk, segment_starts, axis=0)
+        counts = np.add.reduceat(~nans, segment_starts, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means[:, columns] = sums / counts  # all-NaN groups are NaN, same as a NaN-skipping mean
+    means = np.moveaxis(means.reshape(group_shape), 0, axis)
+
+    coords = {coord: (dims, values if not array_is_element(dims, dim) else values[first_indices])
+              for coord, dims, values in walk_coords(assembly)
+              if not array_is_element(dims, dim) or coord in group_coords}
+    result = type(assembly)(means, coords=coords, dims=assembly.dims)
+    return result
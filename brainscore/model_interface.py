@@ -9,6 +9,16 @@ class BrainModel:
     def look_at(self, stimuli):
         raise NotImplementedError()
 
+    def look_at_batches(self, stimuli, batch_size=256):
+        """
+        Streaming variant of `look_at`: yields the outputs for consecutive batches of `batch_size` stimuli
+        so that consumers never need to hold the outputs to all stimuli at once.
+        Models that can produce outputs batch by batch should override this;
+        by default, `look_at` is called on every batch.
+        """
+        for batch_start in range(0, len(stimuli), batch_size):
+            yield self.look_at(stimuli[batch_start:batch_start + batch_size])
+
     def start_task(self, task: Task, fitting_stimuli):
         raise NotImplementedError()
 
@@ -1,10 +1,78 @@
+import contextlib
 import copy
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from tqdm import tqdm
 
 
 def fullname(obj):
     return obj.__module__ + "." + obj.__class__.__name__
 
 
+def map_parallel(func, args_list, executor, max_workers=None, desc=None):
+    """
+    Calls `func(*args)` for every `args` in `args_list` in a pool of workers
+    and returns the results in the order of `args_list`.
+    :param executor: `'thread'` or `'process'`.
+        With threads, every call operates on its own deep copy of `func`
+        so that stateful callables (e.g. a regression that is fit in-place) are not shared between workers.
+        With processes, `func` and its arguments have to be picklable.
+    :param max_workers: number of workers, defaults to the executor's default
+    """
+    executors = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+    if executor not in executors:
+        raise ValueError(f"Unknown executor '{executor}' - must choose from {list(executors.keys())}")
+    with executors[executor](max_workers=max_workers) as pool:
+        futures = [pool.submit(copy.deepcopy(func) if executor == 'thread' else func, *args) for args in args_list]
+        return [future.result() for future in tqdm(futures, desc=desc)]
+
+
+def default_cache_directory(name):
+    """
+    :return: the directory `name` within `$RESULTCACHING_HOME`, i.e. next to the results cached by `result_caching`
+    """
+    return os.path.expanduser(os.path.join(os.getenv('RESULTCACHING_HOME', '~/.result_caching'), name))
+
+
+@contextlib.contextmanager
+def atomic_write(path, directory=False, overwrite=True):
+    """
+    Yields a temporary path next to `path` to write to, which is moved to `path` once writing succeeded
+    so that concurrent readers never see partially written files. The temporary path is removed if writing fails.
+    :param directory: whether to write a directory rather than a single file
+    :param overwrite: whether to replace an existing `path`,
+        otherwise the existing `path` (e.g. written by another process in the meantime) is kept
+    """
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    if directory:
+        tmp_path = tempfile.mkdtemp(dir=parent)
+    else:
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=parent)
+        os.close(file_descriptor)
+    try:
+        yield tmp_path
+        if os.path.exists(path):
+            if not overwrite:
+                return
+            if directory:
+                shutil.rmtree(path)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            if overwrite:
+                raise
+            # another process wrote `path` in the meantime
+    finally:
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 def map_fields(obj, func):
     for field_name, field_value in vars(obj).items():
         field_value = func(field_value)
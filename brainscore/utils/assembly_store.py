@@ -0,0 +1,89 @@
+import functools
+import inspect
+import logging
+import os
+import pickle
+
+import numpy as np
+
+from brainscore.utils import fullname, atomic_write, default_cache_directory
+
+
+class AssemblyStore:
+    """
+    Stores assemblies on disk such that their values can be memory-mapped when loading:
+    the values are saved as a raw `.npy` file, coords, dims and attrs are pickled into a sidecar file.
+    Processes loading the same assembly thus share one copy of the data instead of each unpickling their own.
+    """
+
+    VALUES_FILENAME = 'values.npy'
+    META_FILENAME = 'meta.pkl'
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = default_cache_directory('assemblies')
+        self._directory = os.path.expanduser(directory)
+        self._logger = logging.getLogger(fullname(self))
+
+    def path(self, identifier):
+        return os.path.join(self._directory, identifier)
+
+    def exists(self, identifier):
+        return os.path.isfile(os.path.join(self.path(identifier), self.META_FILENAME))
+
+    def save(self, assembly, identifier):
+        path = self.path(identifier)
+        self._logger.debug(f"Saving assembly to {path}")
+        with atomic_write(path, directory=True) as tmp_path:
+            np.save(os.path.join(tmp_path, self.VALUES_FILENAME), assembly.values, allow_pickle=True)
+            meta = {'class': type(assembly), 'dims': assembly.dims, 'name': assembly.name,
+                    'coords': assembly.coords.to_dataset(),  # keeps MultiIndexes and scalar coords as they are
+                    'attrs': assembly.attrs}
+            with open(os.path.join(tmp_path, self.META_FILENAME), 'wb') as f:
+                pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, identifier):
+        path = self.path(identifier)
+        self._logger.debug(f"Loading assembly from {path}")
+        with open(os.path.join(path, self.META_FILENAME), 'rb') as f:
+            meta = pickle.load(f)
+        values_path = os.path.join(path, self.VALUES_FILENAME)
+        try:
+            # copy-on-write: pages are shared between processes until a process writes to them
+            values = np.load(values_path, mmap_mode='c')
+        except ValueError:  # object arrays cannot be memory-mapped
+            values = np.load(values_path, allow_pickle=True)
+        assembly = meta['class'](values, coords=meta['coords'].coords, dims=meta['dims'], name=meta['name'])
+        assembly.attrs = meta['attrs']
+        return assembly
+
+
+def store_assembly(identifier_ignore=(), directory=None):
+    """
+    Caches the assembly returned by the decorated function in an :class:`AssemblyStore`.
+    The cache is keyed by the function's module and qualified name and by all its arguments
+    (except `self` and `identifier_ignore`), e.g.
+    `brainscore.benchmarks.majaj2015.load_assembly/average_repetitions=True,region=IT,access=private`.
+    Delete the corresponding directory to clear the cache.
+    """
+
+    def decorator(function):
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            arguments = ",".join(f"{key}={value}" for key, value in arguments.arguments.items()
+                                 if key != 'self' and key not in identifier_ignore)
+            identifier = os.path.join(f"{function.__module__}.{function.__qualname__}", arguments)
+            store = AssemblyStore(directory=directory)
+            if store.exists(identifier):
+                return store.load(identifier)
+            assembly = function(*args, **kwargs)
+            store.save(assembly, identifier)
+            return assembly
+
+        return wrapper
+
+    return decorator
@@ -30,6 +30,9 @@ setup(
     packages=find_packages(exclude=['tests']),
     include_package_data=True,
     install_requires=requirements,
+    entry_points={
+        'console_scripts': ['brainscore-run=brainscore.benchmarks.runner:main'],
+    },
     license="MIT license",
     zip_safe=False,
     keywords='brain-score',
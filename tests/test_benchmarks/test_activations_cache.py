@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from brainio_base.assemblies import NeuroidAssembly
+from brainio_base.stimuli import StimulusSet
+from brainscore.benchmarks.activations_cache import ActivationsCache
+from brainscore.model_interface import BrainModel
+from brainscore.utils.assembly_store import AssemblyStore
+
+
+class CountingModel(BrainModel):
+    identifier = 'dummy-model'
+
+    def __init__(self):
+        self.calls = 0
+
+    def start_recording(self, recording_target, time_bins=None):
+        pass
+
+    def start_task(self, task, fitting_stimuli):
+        pass
+
+    def look_at(self, stimuli):
+        self.calls += 1
+        return NeuroidAssembly(np.random.rand(len(stimuli), 3),
+                               coords={'image_id': ('presentation', stimuli['image_id'].values),
+                                       'neuroid_id': ('neuroid', np.arange(3))},
+                               dims=['presentation', 'neuroid'])
+
+
+def _stimulus_set(name):
+    stimuli = StimulusSet(pd.DataFrame({'image_id': [f"image{i}" for i in range(5)]}))
+    stimuli.name = name
+    return stimuli
+
+
+class TestActivationsCache:
+    def test_reuses_recordings(self):
+        model = CountingModel()
+        cached = ActivationsCache(model)
+        stimuli = _stimulus_set('dummy')
+        cached.start_recording('IT', time_bins=[(70, 170)])
+        activations = cached.look_at(stimuli)
+        cached.start_recording('IT', time_bins=[(70, 170)])
+        reused = cached.look_at(stimuli)
+        assert model.calls == 1
+        np.testing.assert_array_equal(activations.values, reused.values)
+        cached.start_recording('V4', time_bins=[(70, 170)])
+        cached.look_at(stimuli)
+        cached.start_recording('IT', time_bins=[(70, 80)])
+        cached.look_at(stimuli)
+        cached.start_recording('IT', time_bins=[(70, 170)])
+        cached.look_at(_stimulus_set('other'))
+        assert model.calls == 4
+
+    def test_tasks_not_cached(self):
+        model = CountingModel()
+        cached = ActivationsCache(model)
+        stimuli = _stimulus_set('dummy')
+        cached.start_task(BrainModel.Task.probabilities, stimuli)
+        cached.look_at(stimuli)
+        cached.look_at(stimuli)
+        assert model.calls == 2
+
+    def test_store(self, tmpdir):
+        store = AssemblyStore(directory=str(tmpdir))
+        stimuli = _stimulus_set('dummy')
+        cached = ActivationsCache(CountingModel(), store=store)
+        cached.start_recording('IT', time_bins=[(70, 170)])
+        activations = cached.look_at(stimuli)
+        model = CountingModel()
+        cached = ActivationsCache(model, store=store)
+        cached.start_recording('IT', time_bins=[(70, 170)])
+        stored = cached.look_at(stimuli)
+        assert model.calls == 0
+        np.testing.assert_array_equal(activations.values, stored.values)
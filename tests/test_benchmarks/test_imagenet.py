@@ -1,6 +1,11 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
 from pytest import approx
 
-from brainscore.benchmarks.imagenet import Imagenet2012
+from brainscore.benchmarks.imagenet import Imagenet2012, load_stimulus_set
 from brainscore.model_interface import BrainModel
 
 
@@ -21,3 +26,42 @@ class TestImagenet2012:
         candidate = GroundTruth()
         score = benchmark(candidate)
         assert score.sel(aggregation='center') == approx(1)
+
+    @pytest.mark.parametrize('per_synset', [False, True])
+    def test_groundtruth_batches(self, per_synset):
+        benchmark = Imagenet2012(per_synset=per_synset)
+        source = benchmark._stimulus_set
+
+        class GroundTruthBatches(BrainModel):
+            def start_task(self, task, fitting_stimuli):
+                pass
+
+            def look_at_batches(self, stimuli, batch_size=256):
+                for batch_start in range(0, len(stimuli), batch_size):
+                    batch = stimuli[batch_start:batch_start + batch_size]
+                    yield source.set_index('image_id').loc[batch['image_id'].values, 'synset'].values
+
+        score = benchmark(GroundTruthBatches())
+        assert score.sel(aggregation='center') == approx(1)
+        if per_synset:
+            per_label = score.attrs['per_label']
+            assert set(per_label['label'].values) == set(source['synset'].values)
+            np.testing.assert_array_equal(per_label.values, 1)
+
+
+def test_load_stimulus_set(tmpdir):
+    csv_path = os.path.join(str(tmpdir), 'stimuli.csv')
+    table = pd.DataFrame({'image_id': [f"image{i}" for i in range(100)],
+                          'filepath': [f"/images/image{i}.png" for i in range(100)],
+                          'synset': np.random.choice(['n01', 'n02', 'n03'], size=100),
+                          'label': np.random.randint(0, 3, size=100)})
+    table.to_csv(csv_path, index=False)
+    cache_directory = os.path.join(str(tmpdir), 'cache')
+    parsed = load_stimulus_set(csv_path, categorical_columns=['synset'], cache_directory=cache_directory)
+    cached = load_stimulus_set(csv_path, categorical_columns=['synset'], cache_directory=cache_directory)
+    for loaded in [parsed, cached]:
+        assert list(loaded.columns) == list(table.columns)
+        np.testing.assert_array_equal(loaded['image_id'].values, table['image_id'].values)
+        np.testing.assert_array_equal(loaded['label'].values, table['label'].values)
+        np.testing.assert_array_equal(np.asarray(loaded['synset'].values), table['synset'].values)
+        assert isinstance(loaded['synset'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,55 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from brainscore.benchmarks import benchmark_pool
+from brainscore.benchmarks.runner import run, _group_requests, _pack_stimuli
+from brainscore.metrics import Score
+from tests.test_benchmarks.test_activations_cache import CountingModel, _stimulus_set
+
+
+class MeanBenchmark:
+    def __init__(self, region):
+        self.region = region
+
+    def __call__(self, candidate):
+        candidate.start_recording(self.region, time_bins=[(70, 170)])
+        activations = candidate.look_at(_stimulus_set('dummy'))
+        return Score([activations.values.mean(), np.nan], coords={'aggregation': ['center', 'error']},
+                     dims=['aggregation'])
+
+
+@pytest.fixture
+def dummy_benchmarks():
+    benchmarks = {'dummy.IT-mean': MeanBenchmark('IT'), 'dummy.IT-mean2': MeanBenchmark('IT'),
+                  'dummy.V4-mean': MeanBenchmark('V4')}
+    benchmark_pool.update(benchmarks)
+    yield list(benchmarks)
+    for identifier in benchmarks:
+        del benchmark_pool[identifier]
+
+
+@pytest.mark.parametrize('start_method', [None, 'spawn'])
+def test_run(dummy_benchmarks, start_method):
+    model = CountingModel()
+    mp_context = multiprocessing.get_context(start_method) if start_method else None
+    scores = dict(run(dummy_benchmarks, model, max_workers=2, mp_context=mp_context))
+    assert set(scores) == set(dummy_benchmarks)
+    assert model.calls == 2  # IT activations shared between both IT benchmarks
+    assert scores['dummy.IT-mean'].sel(aggregation='center') == scores['dummy.IT-mean2'].sel(aggregation='center')
+
+
+def test_unknown_benchmark():
+    with pytest.raises(ValueError):
+        list(run(['dummy.does-not-exist'], CountingModel()))
+
+
+def test_group_requests():
+    recording = 'start_recording', ('IT', [(70, 170)])
+    requests = [('IT-1', recording, _pack_stimuli(_stimulus_set('dummy'))),
+                ('V4', ('start_recording', ('V4', [(70, 170)])), _pack_stimuli(_stimulus_set('dummy'))),
+                ('IT-2', recording, _pack_stimuli(_stimulus_set('dummy')))]
+    groups = list(_group_requests(requests).values())
+    assert [identifiers for _, _, identifiers in groups] == [['IT-1', 'IT-2'], ['V4']]
+    assert groups[0][1].name == 'dummy'
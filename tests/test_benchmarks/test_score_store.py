@@ -0,0 +1,67 @@
+import os
+
+import pytest
+from pytest import approx
+
+from brainscore.benchmarks.score_store import ScoreStore, StoredBenchmark, DirectoryBackend, SqliteBackend
+from brainscore.metrics import Score
+
+
+class CountingBenchmark:
+    def __init__(self, version=1):
+        self.identifier = 'dummy.benchmark'
+        self.version = version
+        self.calls = 0
+
+    def __call__(self, candidate):
+        self.calls += 1
+        return Score([.5, .1], coords={'aggregation': ['center', 'error']}, dims=['aggregation'])
+
+
+class IdentifiedCandidate:
+    identifier = 'dummy-model'
+
+
+@pytest.fixture(params=['directory', 'sqlite'])
+def store(request, tmpdir):
+    if request.param == 'directory':
+        return ScoreStore(DirectoryBackend(str(tmpdir)))
+    return ScoreStore(SqliteBackend(os.path.join(str(tmpdir), 'scores.sqlite')))
+
+
+class TestStoredBenchmark:
+    def test_reuses_score(self, store):
+        benchmark = CountingBenchmark()
+        stored_benchmark = StoredBenchmark(benchmark, store=store)
+        score = stored_benchmark(IdentifiedCandidate())
+        stored_score = stored_benchmark(IdentifiedCandidate())
+        assert benchmark.calls == 1
+        assert stored_score.sel(aggregation='center') == approx(score.sel(aggregation='center'))
+        assert stored_benchmark.identifier == 'dummy.benchmark'
+
+    def test_keys(self, store):
+        benchmark = CountingBenchmark()
+        stored_benchmark = StoredBenchmark(benchmark, store=store)
+        stored_benchmark(IdentifiedCandidate())
+        stored_benchmark(IdentifiedCandidate(), model_identifier='other-model')
+        stored_benchmark(IdentifiedCandidate(), layer_commitment={'IT': 'layer4'})
+        assert benchmark.calls == 3
+        stored_benchmark(IdentifiedCandidate(), layer_commitment={'IT': 'layer4'})
+        assert benchmark.calls == 3
+
+    def test_version_invalidates(self, store):
+        StoredBenchmark(CountingBenchmark(version=1), store=store)(IdentifiedCandidate())
+        benchmark = CountingBenchmark(version=2)
+        StoredBenchmark(benchmark, store=store)(IdentifiedCandidate())
+        assert benchmark.calls == 1
+        assert store.invalidate(benchmark) == 0  # the outdated score was replaced by the current one
+        assert store.load(benchmark, 'dummy-model') is not None
+        assert store.invalidate(benchmark, keep_current=False) == 1
+        assert store.load(benchmark, 'dummy-model') is None
+
+    def test_no_identifier(self, store):
+        benchmark = CountingBenchmark()
+        stored_benchmark = StoredBenchmark(benchmark, store=store)
+        stored_benchmark(object())
+        stored_benchmark(object())
+        assert benchmark.calls == 2
@@ -0,0 +1,28 @@
+import numpy as np
+from pytest import approx
+
+from brainscore.metrics.accuracy import Accuracy, IncrementalAccuracy
+
+
+class TestIncrementalAccuracy:
+    def test_equals_accuracy(self):
+        target = np.random.choice(['a', 'b', 'c'], size=100)
+        source = np.where(np.random.rand(100) < .7, target, 'd')
+        expected = Accuracy()(source, target)
+        accuracy = IncrementalAccuracy()
+        for batch_start in range(0, 100, 32):
+            accuracy.update(source[batch_start:batch_start + 32], target[batch_start:batch_start + 32])
+        score = accuracy.result()
+        assert score.sel(aggregation='center') == approx(expected.sel(aggregation='center'))
+        assert score.sel(aggregation='error') == approx(expected.sel(aggregation='error'))
+        assert 'raw' not in score.attrs
+
+    def test_per_label(self):
+        accuracy = IncrementalAccuracy(per_label=True)
+        accuracy.update(['a', 'b', 'a'], ['a', 'a', 'b'])
+        accuracy.update(['b', 'c'], ['b', 'c'])
+        score = accuracy.result()
+        assert score.sel(aggregation='center') == approx(.6)
+        per_label = score.attrs['per_label']
+        np.testing.assert_array_equal(per_label['label'].values, ['a', 'b', 'c'])
+        np.testing.assert_array_almost_equal(per_label.values, [.5, .5, 1])
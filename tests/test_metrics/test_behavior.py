@@ -1,5 +1,6 @@
 import os
 
+import numpy as np
 import pandas as pd
 import pytest
 from pytest import approx
@@ -35,3 +36,63 @@ class TestI2N:
         ceiling = i2n.ceiling(objectome)
         assert ceiling.sel(aggregation='center') == approx(.4786, abs=.0064)
         assert ceiling.sel(aggregation='error') == approx(.00537, abs=.0015)
+
+
+class TestResponseMatrix:
+    def test_small(self):
+        responses = BehavioralAssembly(['a', 'b', 'a', 'a', 'b'],
+                                       coords={'image_id': ('presentation', ['img1', 'img1', 'img1', 'img2', 'img2']),
+                                               'truth': ('presentation', ['a', 'a', 'a', 'b', 'b']),
+                                               'sample_obj': ('presentation', ['a', 'a', 'a', 'b', 'b']),
+                                               'dist_obj': ('presentation', ['b', 'b', 'c', 'a', 'c'])},
+                                       dims=['presentation'])
+        response_matrix = I2n().build_response_matrix_from_responses(responses)
+        np.testing.assert_array_equal(response_matrix['choice'].values, ['a', 'b'])
+        np.testing.assert_array_equal(response_matrix['image_id'].values, ['img1', 'img2'])
+        np.testing.assert_array_equal(response_matrix.values, [[np.nan, .5], [1, np.nan]])
+
+
+    def test_subsets_equal_individual(self):
+        responses = BehavioralAssembly(['a', 'b', 'a', 'a', 'b', 'b'],
+                                       coords={'image_id': ('presentation', ['img1', 'img1', 'img1', 'img2', 'img2',
+                                                                             'img1']),
+                                               'truth': ('presentation', ['a', 'a', 'a', 'b', 'b', 'a']),
+                                               'sample_obj': ('presentation', ['a', 'a', 'a', 'b', 'b', 'a']),
+                                               'dist_obj': ('presentation', ['b', 'b', 'c', 'a', 'c', 'b'])},
+                                       dims=['presentation'])
+        i2n = I2n()
+        subsets = [np.array([0, 1, 3, 4]), np.array([2, 3, 5]), np.array([1, 4, 0])]
+        response_matrices = i2n.build_response_matrices_from_responses(responses, subsets)
+        for subset, response_matrix in zip(subsets, response_matrices):
+            expected = i2n.build_response_matrix_from_responses(responses[subset])
+            np.testing.assert_array_equal(response_matrix.values, expected.values)
+
+    def test_half_indices_deterministic(self):
+        few, many = I2n(repetitions=2).generate_half_indices(10), I2n(repetitions=5).generate_half_indices(10)
+        for (few1, few2), (many1, many2) in zip(few, many[:2]):
+            np.testing.assert_array_equal(few1, many1)
+            np.testing.assert_array_equal(few2, many2)
+
+
+class TestVectorized:
+    @classmethod
+    def _probabilities(cls):
+        random_state = np.random.RandomState(0)
+        truths = ['a', 'b', 'c'] * 4
+        return BehavioralAssembly(random_state.rand(12, 3),
+                                  coords={'image_id': ('presentation', [f"img{i}" for i in range(12)]),
+                                          'truth': ('presentation', truths),
+                                          'choice': ('choice', ['a', 'b', 'c'])},
+                                  dims=['presentation', 'choice'])
+
+    def test_target_distractor_scores(self):
+        probabilities = self._probabilities()
+        i2n = I2n()
+        np.testing.assert_allclose(i2n.target_distractor_scores(probabilities).values,
+                                   i2n._target_distractor_scores_per_cell(probabilities).values)
+
+    def test_dprime(self):
+        i2n = I2n()
+        response_matrix = i2n.target_distractor_scores(self._probabilities())
+        np.testing.assert_allclose(i2n.dprime(response_matrix).values,
+                                   i2n._dprime_per_cell(response_matrix).values)
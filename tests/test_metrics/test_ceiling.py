@@ -29,6 +29,20 @@ class TestInternalConsistency:
         ceiling = ceiler(data)
         assert ceiling.sel(aggregation='center') == 1
 
+    def test_vectorized_equals_splitwise(self):
+        stimulus_values = np.random.rand(10, 10)
+        data = NeuroidAssembly(np.tile(stimulus_values, [5, 1]) + np.random.rand(50, 10),
+                               coords={'image_id': ('presentation', np.tile(list(alphabet)[:10], 5)),
+                                       'image_meta': ('presentation', np.tile(list(alphabet)[:10], 5)),
+                                       'repetition': ('presentation', np.repeat(np.arange(5), 10)),
+                                       'neuroid_id': ('neuroid', np.arange(10)),
+                                       'neuroid_meta': ('neuroid', np.arange(10))},
+                               dims=['presentation', 'neuroid'])
+        vectorized_ceiling = InternalConsistency(vectorized=True)(data)
+        splitwise_ceiling = InternalConsistency()(data)
+        np.testing.assert_array_almost_equal(vectorized_ceiling.values, splitwise_ceiling.values)
+        np.testing.assert_array_almost_equal(vectorized_ceiling.raw.values, splitwise_ceiling.raw.values)
+
     @pytest.mark.private_access
     def test_majaj2015_it(self):
         assembly_repetitions = load_assembly(average_repetitions=False, region='IT')
@@ -0,0 +1,63 @@
+import numpy as np
+
+from brainio_base.assemblies import NeuroidAssembly
+from brainscore.metrics.dimensionality_reduction import SourceProjection, TrainPCA
+from brainscore.metrics.regression import CrossRegressedCorrelation, pls_regression, pearsonr_correlation
+
+
+def _source(num_features):
+    source = NeuroidAssembly(np.random.standard_normal((40, num_features)).astype(np.float32),
+                             coords={'image_id': ('presentation', np.arange(40)),
+                                     'object_name': ('presentation', ['a', 'b'] * 20),
+                                     'neuroid_id': ('neuroid', np.arange(num_features)),
+                                     'layer': ('neuroid', ['conv'] * num_features)},
+                             dims=['presentation', 'neuroid'])
+    source.attrs['stimulus_set_name'] = 'dummy'
+    return source
+
+
+class TestSourceProjection:
+    def test_projects(self):
+        source = _source(5000)
+        projected = SourceProjection(n_components=100)(source)
+        assert projected.shape == (40, 100)
+        assert projected.dtype == np.float32
+        np.testing.assert_array_equal(projected['image_id'].values, source['image_id'].values)
+        np.testing.assert_array_equal(projected['neuroid_id'].values, np.arange(100))
+        assert projected.attrs['stimulus_set_name'] == 'dummy'
+        # distances between stimuli are approximately preserved
+        distance = np.linalg.norm(source.values[0] - source.values[1])
+        projected_distance = np.linalg.norm(projected.values[0] - projected.values[1])
+        assert abs(projected_distance / distance - 1) < .3
+
+    def test_cached(self):
+        projection = SourceProjection(n_components=100)
+        source = _source(5000)
+        projected = projection(source)
+        assert projection(source.copy(deep=False)) is projected
+        assert projection(_source(5000)) is not projected
+
+    def test_small_unchanged(self):
+        source = _source(50)
+        assert SourceProjection(n_components=100)(source) is source
+
+
+class TestTrainPCA:
+    def test_components(self):
+        from sklearn.linear_model import LinearRegression
+        regression = LinearRegression()
+        reduced = TrainPCA(regression, n_components=10)
+        X = np.random.standard_normal((40, 200))
+        reduced.fit(X, np.random.standard_normal((40, 5)))
+        assert regression.coef_.shape == (5, 10)
+        assert reduced.predict(np.random.standard_normal((8, 200))).shape == (8, 5)
+
+    def test_metric(self):
+        latents = np.random.standard_normal((40, 5))
+        source = _source(200)
+        source.values[:] = latents @ np.random.standard_normal((5, 200))
+        target = source.isel(neuroid=slice(0, 10)).astype(np.float64)
+        metric = CrossRegressedCorrelation(regression=pls_regression(pca_components=30),
+                                           correlation=pearsonr_correlation())
+        score = metric(source, target)
+        assert score.sel(aggregation='center') > .9
@@ -0,0 +1,79 @@
+import numpy as np
+
+import pytest
+
+from brainio_base.assemblies import NeuroidAssembly, DataAssembly
+from brainscore.metrics.ost import LogisticProbabilitiesClassifier, OSTCorrelation, interpolate_osts, solve_osts
+
+
+class TestLogisticProbabilitiesClassifier:
+    def test_separable(self):
+        random_state = np.random.RandomState(0)
+        labels = np.array(['dog', 'car', 'face'])[np.arange(60) % 3]
+        values = random_state.normal(size=(60, 10))
+        values[np.arange(60), np.arange(60) % 3] += 5
+        source = NeuroidAssembly(values,
+                                 coords={'image_id': ('presentation', [f"img{i}" for i in range(60)]),
+                                         'image_label': ('presentation', labels),
+                                         'neuroid_id': ('neuroid', np.arange(10))},
+                                 dims=['presentation', 'neuroid'])
+        classifier = LogisticProbabilitiesClassifier()
+        classifier.fit(source, source['image_label'])
+        probabilities = classifier.predict_proba(source)
+        classifier.close()
+        assert probabilities.dims == ('presentation', 'choice')
+        np.testing.assert_array_equal(probabilities['choice'].values, ['dog', 'car', 'face'])
+        np.testing.assert_array_equal(probabilities['image_id'].values, source['image_id'].values)
+        np.testing.assert_allclose(probabilities.sum('choice').values, 1)
+        predictions = probabilities['choice'].values[probabilities.values.argmax(axis=1)]
+        np.testing.assert_array_equal(predictions, labels)
+
+
+def test_interpolate_osts():
+    source_i1s = np.array([[0., 1., 2., 3.],  # crosses 1.5 halfway between the second and third bin
+                           [2., 3., 4., 5.],  # hits in the first bin
+                           [0., 0., 0., 0.],  # never hits
+                           [1., np.nan, .5, 3.]])  # last is the highest non-NaN bin before the hit
+    osts = interpolate_osts(source_i1s, np.array([70, 80, 90, 100]), np.array([1.5, 1., 1., 2.]))
+    np.testing.assert_allclose(osts, [85, 70, np.nan, 70 + 30 / 2])
+
+
+def test_solve_osts():
+    osts = solve_osts(last_times=np.array([80, np.nan, 70, 80]), last_i1s=np.array([1, np.nan, 0, .5]),
+                      hit_times=np.array([90, 70, np.nan, 100]), hit_i1s=np.array([2, 2, np.nan, 1.5]),
+                      threshold_i1s=np.array([1.5, 1, 1, 1]))
+    np.testing.assert_allclose(osts, [85, 70, np.nan, 90])
+
+
+class TestComputeOSTs:
+    @classmethod
+    def _source(cls, image_ids, random_state):
+        # the labels become more decodable in later time bins
+        labels = np.array(['dog', 'car', 'face'])[np.arange(len(image_ids)) % 3]
+        time_bin_starts = np.arange(70, 120, 10)
+        values = random_state.normal(size=(len(image_ids), 10, len(time_bin_starts)))
+        values[np.arange(len(image_ids)), np.arange(len(image_ids)) % 3, :] += np.linspace(0, 3, len(time_bin_starts))
+        return NeuroidAssembly(values,
+                               coords={'image_id': ('presentation', image_ids),
+                                       'image_label': ('presentation', labels),
+                                       'truth': ('presentation', labels),
+                                       'neuroid_id': ('neuroid', np.arange(10)),
+                                       'time_bin_start': ('time_bin', time_bin_starts),
+                                       'time_bin_end': ('time_bin', time_bin_starts + 10)},
+                               dims=['presentation', 'neuroid', 'time_bin'])
+
+    @pytest.mark.parametrize('kwargs', [dict(executor='thread'), dict(warm_start=True)])
+    def test_equals_sequential(self, kwargs):
+        random_state = np.random.RandomState(0)
+        train_source = self._source([f"train{i}" for i in range(90)], random_state)
+        test_source = self._source([f"test{i}" for i in range(30)], random_state)
+        test_osts = DataAssembly(np.zeros(30), coords={'image_id': ('presentation', test_source['image_id'].values),
+                                                       'i1': ('presentation', random_state.uniform(0, 3, size=30))},
+                                 dims=['presentation'])
+        sequential = OSTCorrelation(classifier=LogisticProbabilitiesClassifier)
+        expected = sequential.compute_osts(train_source, test_source, test_osts)
+        other = OSTCorrelation(classifier=LogisticProbabilitiesClassifier, **kwargs)
+        actual = other.compute_osts(train_source, test_source, test_osts)
+        assert not np.isnan(expected).all()
+        # warm-started fits converge to the same optimum up to the optimization tolerance
+        np.testing.assert_allclose(actual, expected, atol=1e-2)
@@ -5,7 +5,7 @@ import pytest
 from brainio_base.assemblies import NeuroidAssembly, DataAssembly
 from pytest import approx
 
-from brainscore.metrics.rdm import RSA, RDMSimilarity, RDMMetric, RDMCrossValidated
+from brainscore.metrics.rdm import RSA, RDM, RDMSimilarity, RDMMetric, RDMCrossValidated
 from tests.test_metrics import load_hvm
 
 
@@ -21,6 +21,43 @@ class TestRDMCrossValidated:
         score = metric(assembly1=assembly, assembly2=assembly)
         assert score.sel(aggregation='center') == approx(1)
 
+    def test_precomputed_equals_splitwise(self):
+        target = NeuroidAssembly(np.random.rand(30, 25),
+                                 coords={'image_id': ('presentation', np.arange(30)),
+                                         'object_name': ('presentation', ['a', 'b', 'c'] * 10),
+                                         'neuroid_id': ('neuroid', np.arange(25))},
+                                 dims=['presentation', 'neuroid'])
+        source = (target + np.random.rand(30, 25)).isel(presentation=np.random.permutation(30))
+        precomputed_metric = RDMCrossValidated(precompute=True)
+        precomputed_score = precomputed_metric(assembly1=source, assembly2=target)
+        splitwise_score = RDMCrossValidated()(assembly1=source, assembly2=target)
+        np.testing.assert_array_almost_equal(precomputed_score.values, splitwise_score.values)
+        np.testing.assert_array_almost_equal(precomputed_score.raw.values, splitwise_score.raw.values)
+        # second model against the same target re-uses the target RDM
+        target_rdm = precomputed_metric._target_rdm[2]
+        precomputed_metric(assembly1=source, assembly2=target)
+        assert precomputed_metric._target_rdm[2] is target_rdm
+        # a different target is never scored against the cached RDM
+        other_target = target.copy(data=np.random.rand(30, 25))
+        other_score = precomputed_metric(assembly1=source, assembly2=other_target)
+        assert precomputed_metric._target_rdm[2] is not target_rdm
+        expected_other_score = RDMCrossValidated()(assembly1=source, assembly2=other_target)
+        np.testing.assert_array_almost_equal(other_score.raw.values, expected_other_score.raw.values)
+
+
+class TestRDMMetric:
+    @pytest.mark.parametrize('dtype', [np.float64, np.float32])
+    def test_condensed_equals_full(self, dtype):
+        assembly1 = NeuroidAssembly(np.random.rand(50, 20),
+                                    coords={'image_id': ('presentation', np.random.permutation(50)),
+                                            'neuroid_id': ('neuroid', np.arange(20))},
+                                    dims=['presentation', 'neuroid'])
+        assembly2 = assembly1 + np.random.rand(50, 20)
+        assembly2 = assembly2.isel(presentation=np.random.permutation(50))
+        full_score = RDMMetric()(assembly1, assembly2)
+        condensed_score = RDMMetric(condensed=True, dtype=dtype)(assembly1, assembly2)
+        assert condensed_score.values == approx(full_score.values, abs=1e-5)
+
 
 class TestRSA:
     @pytest.mark.private_access
@@ -75,6 +112,15 @@ class TestRSA:
                                 dims=['presentation', 'presentation'])
         np.testing.assert_array_almost_equal(matrix.values, expected.values)  # does not take ordering into account
 
+    def test_float32(self):
+        assembly = NeuroidAssembly(np.random.rand(50, 20).astype(np.float32),
+                                   coords={'image_id': ('presentation', np.arange(50)),
+                                           'neuroid_id': ('neuroid', np.arange(20))},
+                                   dims=['presentation', 'neuroid'])
+        matrix = RSA(dtype=np.float32)(assembly)
+        assert matrix.dtype == np.float32
+        np.testing.assert_array_almost_equal(matrix.values, RSA()(assembly).values, decimal=5)
+
 
 class TestRDMSimilarity(object):
     def test_2d_equal20(self):
@@ -97,6 +143,16 @@ class TestRDMSimilarity(object):
         score = similarity(rdm, rdm)
         assert score == approx(1.)
 
+    def test_float32_rdm(self):
+        values = np.random.RandomState(0).rand(200, 300).astype(np.float32) + 10
+        assembly = NeuroidAssembly(values, coords={'image_id': ('presentation', np.arange(200)),
+                                                   'neuroid_id': ('neuroid', np.arange(300))},
+                                   dims=['presentation', 'neuroid'])
+        rdm = RDM(dtype=np.float32)(assembly)
+        np.testing.assert_array_equal(np.diag(rdm.values), 0)
+        score = RDMSimilarity()(rdm, rdm)
+        assert score == approx(1.)
+
 
 def test_np_load():
     p_path = os.path.join(os.path.dirname(__file__), "it_rdm.p")
@@ -3,8 +3,10 @@ import pytest
 from pytest import approx
 
 from brainio_base.assemblies import NeuroidAssembly
+from brainscore.metrics.pls import KernelPLSRegression
+from brainscore.metrics.ridge import GCVRidgeRegression, GramRidgeRegression
 from brainscore.metrics.regression import CrossRegressedCorrelation, pls_regression, linear_regression, \
-    pearsonr_correlation
+    pearsonr_correlation, gram_ridge_regression, ridge_regression
 
 
 class TestCrossRegressedCorrelation:
@@ -21,7 +23,8 @@ class TestCrossRegressedCorrelation:
 
 
 class TestRegression:
-    @pytest.mark.parametrize('regression_ctr', [pls_regression, linear_regression])
+    @pytest.mark.parametrize('regression_ctr', [pls_regression, linear_regression, gram_ridge_regression,
+                                                ridge_regression])
     def test_small(self, regression_ctr):
         assembly = NeuroidAssembly((np.arange(30 * 25) + np.random.standard_normal(30 * 25)).reshape((30, 25)),
                                    coords={'image_id': ('presentation', np.arange(30)),
@@ -34,3 +37,97 @@ class TestRegression:
         prediction = regression.predict(source=assembly)
         assert all(prediction['image_id'] == assembly['image_id'])
         assert all(prediction['neuroid_id'] == assembly['neuroid_id'])
+
+
+class TestKernelPLS:
+    @pytest.mark.parametrize('n_targets', [1, 20, 80])
+    @pytest.mark.parametrize('dtype', [np.float64, np.float32])
+    def test_equals_sklearn(self, n_targets, dtype):
+        from sklearn.cross_decomposition import PLSRegression
+        rng = np.random.RandomState(0)
+        X = rng.standard_normal((100, 50))
+        Y = X[:, :10] @ rng.standard_normal((10, n_targets)) + rng.standard_normal((100, n_targets))
+        X_test = rng.standard_normal((20, 50))
+        expected = PLSRegression(n_components=25, scale=False, tol=1e-14, max_iter=5000).fit(X, Y).predict(X_test)
+        actual = KernelPLSRegression(n_components=25, dtype=dtype).fit(X, Y).predict(X_test)
+        assert actual.dtype == dtype
+        np.testing.assert_allclose(actual, expected.reshape(actual.shape), rtol=1e-3, atol=1e-3)
+
+    @pytest.mark.parametrize('scale', [1e-5, 1e5])
+    @pytest.mark.parametrize('dtype', [np.float64, np.float32])
+    def test_scale_invariant(self, scale, dtype):
+        from sklearn.cross_decomposition import PLSRegression
+        rng = np.random.RandomState(0)
+        X = rng.standard_normal((100, 50))
+        Y = X[:, :10] @ rng.standard_normal((10, 20)) + rng.standard_normal((100, 20))
+        X_test = rng.standard_normal((20, 50))
+        X, Y, X_test = X * scale, Y * scale, X_test * scale
+        expected = PLSRegression(n_components=25, scale=False, tol=1e-14, max_iter=5000).fit(X, Y).predict(X_test)
+        actual = KernelPLSRegression(n_components=25, dtype=dtype).fit(X, Y).predict(X_test)
+        np.testing.assert_allclose(actual / scale, expected / scale, rtol=1e-3, atol=1e-3)
+
+    def test_xarray(self):
+        assembly = NeuroidAssembly((np.arange(30 * 25) + np.random.standard_normal(30 * 25)).reshape((30, 25)),
+                                   coords={'image_id': ('presentation', np.arange(30)),
+                                           'object_name': ('presentation', ['a', 'b', 'c'] * 10),
+                                           'neuroid_id': ('neuroid', np.arange(25)),
+                                           'region': ('neuroid', ['some_region'] * 25)},
+                                   dims=['presentation', 'neuroid'])
+        metric = CrossRegressedCorrelation(regression=pls_regression(engine='kernel'),
+                                           correlation=pearsonr_correlation())
+        score = metric(source=assembly, target=assembly)
+        assert score.sel(aggregation='center') == approx(1, abs=.0001)
+
+
+class TestGramRidge:
+    def test_equals_sklearn(self):
+        from sklearn.linear_model import Ridge
+        source = NeuroidAssembly(np.random.standard_normal((40, 60)),
+                                 coords={'image_id': ('presentation', np.random.permutation(40)),
+                                         'neuroid_id': ('neuroid', np.arange(60))},
+                                 dims=['presentation', 'neuroid'])
+        target = NeuroidAssembly(source.values[:, :5] @ np.random.standard_normal((5, 8)),
+                                 coords={'image_id': ('presentation', source['image_id'].values),
+                                         'neuroid_id': ('neuroid', np.arange(8))},
+                                 dims=['presentation', 'neuroid'])
+        train, test = source['image_id'].values < 30, source['image_id'].values >= 30
+        regression = gram_ridge_regression(regression_kwargs=dict(alpha=.5))
+        regression.prepare(source)
+        regression.fit(source[train], target[train])
+        prediction = regression.predict(source[test]).sortby('image_id')
+        expected = Ridge(alpha=.5).fit(source[train].values, target[train].values).predict(
+            source[test].sortby('image_id').values)
+        np.testing.assert_array_almost_equal(prediction.values, expected)
+        # unprepared regressions fall back to the features
+        unprepared_regression = gram_ridge_regression(regression_kwargs=dict(alpha=.5))
+        unprepared_regression.fit(source[train], target[train])
+        unprepared_prediction = unprepared_regression.predict(source[test]).sortby('image_id')
+        np.testing.assert_array_almost_equal(unprepared_prediction.values, expected)
+
+    def test_other_source_same_stimuli(self):
+        from sklearn.linear_model import Ridge
+        rng = np.random.RandomState(0)
+        X1, X2, Y = rng.standard_normal((40, 60)), rng.standard_normal((40, 30)), rng.standard_normal((40, 8))
+        ids = np.arange(40)
+        regression = GramRidgeRegression(alpha=.5)
+        regression.prepare(X1, ids)
+        regression.fit(X2[:30], Y[:30], ids[:30])
+        prediction = regression.predict(X2[30:], ids[30:])
+        expected = Ridge(alpha=.5).fit(X2[:30], Y[:30]).predict(X2[30:])
+        np.testing.assert_array_almost_equal(prediction, expected)
+
+
+class TestGCVRidge:
+    @pytest.mark.parametrize('num_features', [20, 200])
+    def test_equals_sklearn(self, num_features):
+        from sklearn.linear_model import RidgeCV
+        rng = np.random.RandomState(0)
+        X = rng.standard_normal((50, num_features)) * 3 + 1
+        noise = rng.standard_normal((50, 6)) * np.array([0, .1, 1, 5, 10, 50])
+        Y = X[:, :5] @ rng.standard_normal((5, 6)) + noise
+        X_test = rng.standard_normal((10, num_features))
+        alphas = np.logspace(-3, 6, 10)
+        expected = RidgeCV(alphas=alphas, alpha_per_target=True).fit(X, Y)
+        actual = GCVRidgeRegression(alphas=alphas).fit(X, Y)
+        np.testing.assert_array_equal(actual.alpha_, expected.alpha_)
+        np.testing.assert_array_almost_equal(actual.predict(X_test), expected.predict(X_test))
@@ -0,0 +1,69 @@
+import numpy as np
+import scipy.stats
+
+from brainio_base.assemblies import NeuroidAssembly
+from brainscore.metrics.streaming import StreamingPearson, StreamingCorrelation, StreamingRidgeRegression, \
+    XarrayStreamingRegression
+from brainscore.metrics.xarray_utils import XarrayCorrelation
+from brainscore.model_interface import BrainModel
+
+
+def _assembly(values, image_ids):
+    return NeuroidAssembly(values,
+                           coords={'image_id': ('presentation', image_ids),
+                                   'neuroid_id': ('neuroid', np.arange(values.shape[1]))},
+                           dims=['presentation', 'neuroid'])
+
+
+def _batches(assembly, batch_size):
+    for batch_start in range(0, len(assembly['presentation']), batch_size):
+        yield assembly.isel(presentation=slice(batch_start, batch_start + batch_size))
+
+
+class TestStreamingPearson:
+    def test_equals_full(self):
+        x, y = np.random.rand(100, 5), np.random.rand(100, 5)
+        pearson = StreamingPearson()
+        for batch_start in range(0, 100, 30):
+            pearson.update(x[batch_start:batch_start + 30], y[batch_start:batch_start + 30])
+        r = pearson.result()
+        for column in range(5):
+            np.testing.assert_almost_equal(r[column], scipy.stats.pearsonr(x[:, column], y[:, column])[0])
+
+
+class TestStreamingCorrelation:
+    def test_equals_xarray_correlation(self):
+        target = _assembly(np.random.rand(100, 10), np.arange(100))
+        prediction = _assembly(target.values + np.random.rand(100, 10), np.arange(100))
+        prediction = prediction.isel(presentation=np.random.permutation(100))
+        correlation = StreamingCorrelation()
+        for batch in _batches(prediction, 32):
+            correlation.update(batch, target)
+        score = correlation.result()
+        expected = XarrayCorrelation(scipy.stats.pearsonr)(prediction, target)
+        np.testing.assert_array_almost_equal(score.values, expected.values)
+        np.testing.assert_array_equal(score['neuroid_id'].values, expected['neuroid_id'].values)
+
+
+class TestStreamingRegression:
+    def test_equals_sklearn(self):
+        from sklearn.linear_model import Ridge
+        source = _assembly(np.random.rand(100, 20), np.random.permutation(100))
+        target_values = source.values @ np.random.rand(20, 5)
+        target = _assembly(target_values, source['image_id'].values).sortby('image_id')
+        regression = XarrayStreamingRegression(StreamingRidgeRegression(alpha=.1))
+        for batch in _batches(source, 32):
+            regression.partial_fit(batch, target)
+        prediction = regression.predict(source)
+        expected = Ridge(alpha=.1).fit(source.values, target_values)
+        np.testing.assert_array_almost_equal(prediction.values, expected.predict(source.values))
+        np.testing.assert_array_equal(prediction['neuroid_id'].values, target['neuroid_id'].values)
+
+
+def test_look_at_batches():
+    class Model(BrainModel):
+        def look_at(self, stimuli):
+            return list(stimuli)
+
+    batches = list(Model().look_at_batches(list(range(10)), batch_size=4))
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
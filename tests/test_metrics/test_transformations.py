@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 
 from brainio_base.assemblies import NeuroidAssembly, DataAssembly
 from brainscore.metrics import Metric
@@ -81,6 +82,45 @@ class TestCrossValidation:
                len(metric.train_target_assemblies) == len(metric.test_target_assemblies) == 10
         assert len(score.attrs['raw']) == 10
 
+    @pytest.mark.parametrize('executor', ['thread', 'process'])
+    def test_executor_equals_serial(self, executor):
+        source = NeuroidAssembly(np.random.rand(500, 10),
+                                 coords={'image_id': ('presentation', list(range(500))),
+                                         'image_meta': ('presentation', [0] * 500),
+                                         'neuroid_id': ('neuroid', list(range(10))),
+                                         'neuroid_meta': ('neuroid', [0] * 10)},
+                                 dims=['presentation', 'neuroid'])
+        target = source + 1
+        serial_score = CrossValidation(splits=10, stratification_coord=None)(
+            source, target, apply=_test_target_mean)
+        parallel_score = CrossValidation(splits=10, stratification_coord=None, executor=executor, max_workers=2)(
+            source, target, apply=_test_target_mean)
+        np.testing.assert_array_equal(serial_score.values, parallel_score.values)
+        np.testing.assert_array_equal(serial_score.raw.values, parallel_score.raw.values)
+        np.testing.assert_array_equal(serial_score.raw['split'].values, parallel_score.raw['split'].values)
+
+    def test_subset_by_index_equals_subset(self):
+        source = NeuroidAssembly(np.random.rand(500, 10),
+                                 coords={'image_id': ('presentation', list(reversed(range(500)))),
+                                         'image_meta': ('presentation', [0] * 500),
+                                         'neuroid_id': ('neuroid', list(range(10))),
+                                         'neuroid_meta': ('neuroid', [0] * 10)},
+                                 dims=['presentation', 'neuroid'])
+        target = source.sortby('image_id')
+        subset_metric, index_metric = self.MetricPlaceholder(), self.MetricPlaceholder()
+        CrossValidation(splits=10, stratification_coord=None)(source, target, apply=subset_metric)
+        CrossValidation(splits=10, stratification_coord=None, subset_by_index=True)(
+            source, target, apply=index_metric)
+        for kind in ['train_source', 'train_target', 'test_source', 'test_target']:
+            for subset_assembly, index_assembly in zip(getattr(subset_metric, f'{kind}_assemblies'),
+                                                       getattr(index_metric, f'{kind}_assemblies')):
+                np.testing.assert_array_equal(subset_assembly.values, index_assembly.values)
+                np.testing.assert_array_equal(subset_assembly['image_id'].values, index_assembly['image_id'].values)
+
+
+def _test_target_mean(train_source, train_target, test_source, test_target):
+    return DataAssembly(test_target.values.mean())
+
 
 class TestCartesianProduct:
     def test_no_division3(self):
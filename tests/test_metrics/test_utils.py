@@ -0,0 +1,34 @@
+import numpy as np
+
+from brainio_base.assemblies import NeuroidAssembly
+from brainscore.metrics.utils import group_mean
+
+
+class TestGroupMean:
+    def test_equals_multi_groupby(self):
+        values = np.random.rand(40, 5)
+        values[3, 2] = np.nan
+        assembly = NeuroidAssembly(values,
+                                   coords={'image_id': ('presentation', np.tile(np.arange(10), 4)),
+                                           'object_name': ('presentation', np.tile(['a', 'b'], 20)),
+                                           'repetition': ('presentation', np.repeat(np.arange(4), 10)),
+                                           'neuroid_id': ('neuroid', np.arange(5)),
+                                           'region': ('neuroid', ['IT'] * 5)},
+                                   dims=['presentation', 'neuroid'])
+        expected = assembly.multi_groupby(['image_id', 'object_name']).mean(dim='presentation', skipna=True)
+        actual = group_mean(assembly, dim='presentation', group_coords=['image_id', 'object_name'])
+        assert actual.dims == expected.dims
+        np.testing.assert_array_equal(actual['image_id'].values, expected['image_id'].values)
+        np.testing.assert_array_equal(actual['object_name'].values, expected['object_name'].values)
+        np.testing.assert_array_equal(actual['region'].values, expected['region'].values)
+        np.testing.assert_array_almost_equal(actual.values, expected.values)
+        assert not hasattr(actual, 'repetition')
+
+    def test_all_nan_group(self):
+        assembly = NeuroidAssembly([[1.], [np.nan], [np.nan], [3.]],
+                                   coords={'image_id': ('presentation', [0, 1, 1, 0]),
+                                           'repetition': ('presentation', [0, 0, 1, 1]),
+                                           'neuroid_id': ('neuroid', [0])},
+                                   dims=['presentation', 'neuroid'])
+        average = group_mean(assembly, dim='presentation', group_coords=['image_id'])
+        np.testing.assert_array_equal(average.values, [[2.], [np.nan]])
@@ -4,7 +4,8 @@ from pytest import approx
 from sklearn.linear_model import LinearRegression
 
 from brainio_base.assemblies import NeuroidAssembly
-from brainscore.metrics.xarray_utils import XarrayRegression, XarrayCorrelation
+from brainscore.metrics.xarray_utils import XarrayRegression, XarrayCorrelation, batched_pearsonr, \
+    Defaults as XarrayDefaults
 
 
 class TestXarrayRegression:
@@ -36,6 +37,22 @@ class TestXarrayRegression:
         assert set(prediction.dims) == {'presentation', 'neuroid'}
         assert len(prediction['neuroid_id']) == 10
 
+    def test_float32(self, monkeypatch):
+        source = NeuroidAssembly(np.random.rand(500, 10),
+                                 coords={'image_id': ('presentation', list(range(500))),
+                                         'neuroid_id': ('neuroid', list(range(10)))},
+                                 dims=['presentation', 'neuroid'])
+        target = source + np.random.rand(500, 10)
+        regression = XarrayRegression(LinearRegression(), dtype=np.float32)
+        regression.fit(source, target)
+        prediction = regression.predict(source)
+        assert prediction.dtype == np.float32
+        # global setting, read when the regression is used
+        regression = XarrayRegression(LinearRegression())
+        monkeypatch.setattr(XarrayDefaults, 'dtype', np.float32)
+        regression.fit(source, target)
+        assert regression.predict(source).dtype == np.float32
+
 
 class TestXarrayCorrelation:
     def test_dimensions(self):
@@ -83,3 +100,35 @@ class TestXarrayCorrelation:
         score = correlation(prediction, prediction)
         np.testing.assert_array_equal(score.dims, ['neuroid'])
         assert len(score['neuroid']) == 10
+
+    def test_batched_equals_per_neuroid(self):
+        prediction = NeuroidAssembly(np.random.rand(500, 10),
+                                     coords={'image_id': ('presentation', list(range(500))),
+                                             'image_meta': ('presentation', [0] * 500),
+                                             'neuroid_id': ('neuroid', list(range(10))),
+                                             'neuroid_meta': ('neuroid', [0] * 10)},
+                                     dims=['presentation', 'neuroid'])
+        target = prediction + np.random.rand(500, 10)
+        batched_score = XarrayCorrelation(scipy.stats.pearsonr)(prediction, target)
+        per_neuroid_score = XarrayCorrelation(scipy.stats.pearsonr, batched=False)(prediction, target)
+        np.testing.assert_array_almost_equal(batched_score.values, per_neuroid_score.values)
+        np.testing.assert_array_equal(batched_score['neuroid_id'].values, per_neuroid_score['neuroid_id'].values)
+
+    def test_batched_float32(self):
+        prediction = NeuroidAssembly(np.random.rand(500, 10).astype(np.float32),
+                                     coords={'image_id': ('presentation', list(range(500))),
+                                             'neuroid_id': ('neuroid', list(range(10)))},
+                                     dims=['presentation', 'neuroid'])
+        target = prediction + np.random.rand(500, 10).astype(np.float32)
+        float32_score = XarrayCorrelation(scipy.stats.pearsonr, dtype=np.float32)(prediction, target)
+        float64_score = XarrayCorrelation(scipy.stats.pearsonr)(prediction, target)
+        np.testing.assert_array_almost_equal(float32_score.values, float64_score.values, decimal=5)
+
+
+def test_batched_pearsonr():
+    x, y = np.random.rand(100, 5), np.random.rand(100, 5)
+    r, p = batched_pearsonr(x, y)
+    for column in range(5):
+        expected_r, expected_p = scipy.stats.pearsonr(x[:, column], y[:, column])
+        assert r[column] == approx(expected_r)
+        assert p[column] == approx(expected_p)
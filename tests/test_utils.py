@@ -1,4 +1,8 @@
+import numpy as np
+
+from brainio_base.assemblies import NeuroidAssembly
 from brainscore.utils import recursive_dict_merge
+from brainscore.utils.assembly_store import store_assembly
 
 
 class TestRecursiveDictMerge:
@@ -19,3 +23,31 @@ class TestRecursiveDictMerge:
         dict2 = {"foo": {"bar": 23, "blub": 42}, "flub": 17}
         merged = recursive_dict_merge(dict1, dict2)
         assert {'foo': {'bar': 23, 'blub': 42}, 'flub': 17, "more": {"stuff": 111}} == merged
+
+
+class TestStoreAssembly:
+    def test_roundtrip(self, tmpdir):
+        calls = []
+
+        @store_assembly(directory=str(tmpdir))
+        def load(region, average_repetitions=True):
+            calls.append((region, average_repetitions))
+            assembly = NeuroidAssembly(np.random.rand(10, 3),
+                                       coords={'image_id': ('presentation', list(range(10))),
+                                               'repetition': ('presentation', [0, 1] * 5),
+                                               'neuroid_id': ('neuroid', list(range(3))),
+                                               'region': ('neuroid', [region] * 3)},
+                                       dims=['presentation', 'neuroid'])
+            assembly.attrs['stimulus_set_name'] = 'dummy'
+            return assembly
+
+        assembly = load('IT')
+        loaded = load('IT')
+        assert calls == [('IT', True)]
+        assert isinstance(loaded, NeuroidAssembly)
+        np.testing.assert_array_equal(assembly.values, loaded.values)
+        np.testing.assert_array_equal(assembly['image_id'].values, loaded['image_id'].values)
+        np.testing.assert_array_equal(assembly['region'].values, loaded['region'].values)
+        assert loaded.attrs['stimulus_set_name'] == 'dummy'
+        load('V4')
+        assert calls == [('IT', True), ('V4', True)]